@@ -0,0 +1,72 @@
+"""unique entity codes
+
+Revision ID: 17c44549a7ba
+Revises: 99a8036a6beb
+Create Date: 2026-10-16 04:26:56.775884
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '17c44549a7ba'
+down_revision: Union[str, Sequence[str], None] = '99a8036a6beb'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (table, code column, filter on the rows the unique index covers)
+_UNIQUE_CODES = (
+    ("owners", "owner_code", "NOT is_deleted"),
+    ("tenants", "tenant_code", "NOT is_deleted"),
+    ("vendors", "vendor_code", "NOT is_deleted"),
+    ("staff_users", "employee_code", None),
+)
+
+
+def _check_duplicate_codes() -> None:
+    """Refuse to upgrade while existing rows would violate the new indexes.
+
+    Duplicate codes are business data, so they are not renamed or deleted
+    here: fix or soft-delete the listed rows, then re-run the upgrade.
+    """
+    bind = op.get_bind()
+    problems = []
+    for table, column, live in _UNIQUE_CODES:
+        where = f"WHERE {live} " if live else ""
+        rows = bind.execute(sa.text(
+            f"SELECT tenant_org_id, {column}, COUNT(*) FROM {table} {where}"
+            f"GROUP BY tenant_org_id, {column} HAVING COUNT(*) > 1"
+        )).all()
+        problems.extend(
+            f"{table}: tenant_org_id={org_id} {column}={code!r} ({count} rows)" for org_id, code, count in rows
+        )
+    if problems:
+        raise RuntimeError(
+            "Cannot create unique code indexes; resolve these duplicate live codes first:\n  "
+            + "\n  ".join(problems)
+        )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _check_duplicate_codes()
+    for table, column in (("owners", "owner_code"), ("tenants", "tenant_code"), ("vendors", "vendor_code")):
+        op.create_index(
+            f"uq_{table}_org_{column}", table, ["tenant_org_id", column], unique=True, if_not_exists=True,
+            postgresql_where=sa.text("NOT is_deleted"), sqlite_where=sa.text("is_deleted = 0"),
+        )
+    op.create_index(
+        "uq_staff_users_org_employee_code", "staff_users", ["tenant_org_id", "employee_code"],
+        unique=True, if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("uq_staff_users_org_employee_code", table_name="staff_users", if_exists=True)
+    for table, column in (("vendors", "vendor_code"), ("tenants", "tenant_code"), ("owners", "owner_code")):
+        op.drop_index(f"uq_{table}_org_{column}", table_name=table, if_exists=True)
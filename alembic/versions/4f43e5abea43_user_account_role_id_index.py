@@ -0,0 +1,30 @@
+"""user account role id index
+
+Revision ID: 4f43e5abea43
+Revises: 17c44549a7ba
+Create Date: 2026-10-16 04:30:16.115575
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f43e5abea43'
+down_revision: Union[str, Sequence[str], None] = '17c44549a7ba'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_user_accounts_role_id_id", "user_accounts", ["role_id", "id"], if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_user_accounts_role_id_id", table_name="user_accounts", if_exists=True)
@@ -0,0 +1,36 @@
+"""kpi daily fact indexes
+
+Revision ID: 5658bbe53bd1
+Revises: 4f43e5abea43
+Create Date: 2026-10-16 04:33:01.830104
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5658bbe53bd1'
+down_revision: Union[str, Sequence[str], None] = '4f43e5abea43'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_kpi_daily_facts_org_metric_date", "kpi_daily_facts",
+        ["tenant_org_id", "metric_code", "fact_date"], if_not_exists=True,
+    )
+    op.create_index(
+        "ix_kpi_daily_facts_org_date_scope", "kpi_daily_facts",
+        ["tenant_org_id", "fact_date", "scope_type"], if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_kpi_daily_facts_org_date_scope", table_name="kpi_daily_facts", if_exists=True)
+    op.drop_index("ix_kpi_daily_facts_org_metric_date", table_name="kpi_daily_facts", if_exists=True)
@@ -0,0 +1,35 @@
+"""user account indexes
+
+Revision ID: 99a8036a6beb
+Revises: 4fcc5de3c519
+Create Date: 2026-10-16 04:18:31.593518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '99a8036a6beb'
+down_revision: Union[str, Sequence[str], None] = '4fcc5de3c519'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_user_accounts_active_id", "user_accounts", ["id"], if_not_exists=True,
+        postgresql_where=sa.text("is_active"), sqlite_where=sa.text("is_active = 1"),
+    )
+    op.create_index(
+        "ix_user_accounts_role_active", "user_accounts", ["role_id", "is_active"], if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_user_accounts_role_active", table_name="user_accounts", if_exists=True)
+    op.drop_index("ix_user_accounts_active_id", table_name="user_accounts", if_exists=True)
@@ -0,0 +1,35 @@
+"""billing lookup indexes
+
+Revision ID: b51cacc699fd
+Revises: 5658bbe53bd1
+Create Date: 2026-10-16 04:49:25.555441
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b51cacc699fd'
+down_revision: Union[str, Sequence[str], None] = '5658bbe53bd1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_exchange_rates_daily_pair_date", "exchange_rates_daily",
+        ["from_currency", "to_currency", "rate_date", "id"], if_not_exists=True,
+    )
+    op.create_index("ix_invoices_org_id", "invoices", ["tenant_org_id", "id"], if_not_exists=True)
+    op.create_index("ix_payments_org_id", "payments", ["tenant_org_id", "id"], if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_payments_org_id", table_name="payments", if_exists=True)
+    op.drop_index("ix_invoices_org_id", table_name="invoices", if_exists=True)
+    op.drop_index("ix_exchange_rates_daily_pair_date", table_name="exchange_rates_daily", if_exists=True)
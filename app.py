@@ -1,8 +1,26 @@
 import os
-from flask import Flask, render_template, redirect, url_for, flash, request, current_app
+
+# Run directly, the app is served by gevent (see bottom of file) unless a dev
+# flag asks for Werkzeug's debug server; sockets are patched before anything imports them
+DEV_SERVER = (os.environ.get('FLASK_ENV') == 'dev'
+              or os.environ.get('FLASK_DEBUG', '').lower() not in ('', '0', 'false'))
+if __name__ == '__main__' and not DEV_SERVER:
+    from gevent import monkey
+    monkey.patch_all()
+
+import sqlite3
+import time
+import click
+from flask import Flask, render_template, redirect, url_for, flash, request, current_app, g
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import event, insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import joinedload, raiseload
+from werkzeug.security import check_password_hash
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
 from datetime import datetime
 
 # --- Configuration ---
@@ -11,15 +29,38 @@ class Config:
     # Use SQLite by default, but allow override for PythonAnywhere MySQL
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///prop_mgmt_v3.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = {'pool_pre_ping': True}
+    if SQLALCHEMY_DATABASE_URI.startswith('sqlite'):
+        SQLALCHEMY_ENGINE_OPTIONS['connect_args'] = {'check_same_thread': False, 'timeout': 30}
+    # Dev/test only: make any relationship not eagerly loaded with the user raise
+    RAISELOAD_GUARD = os.environ.get('RAISELOAD_GUARD') == '1'
 
 app = Flask(__name__)
 app.config.from_object(Config)
 
+@event.listens_for(Engine, 'connect')
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL lets readers proceed while a write is in flight
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute('PRAGMA temp_store=MEMORY')
+    cursor.execute('PRAGMA mmap_size=268435456')
+    cursor.close()
+
 # --- Extensions ---
 db = SQLAlchemy(app)
 login_manager = LoginManager(app)
 login_manager.login_view = 'login'
 
+# Argon2id runs in native code and its cost is tunable; legacy werkzeug hashes
+# are still accepted and upgraded on the next successful login.
+ph = PasswordHasher(time_cost=2, memory_cost=65536, parallelism=1)
+# Verified against when the username is unknown so failed logins cost the same
+DUMMY_HASH = ph.hash('not-a-real-password')
+
 # --- Models ---
 
 # Association table for User-Role (Simplified: User has one role for now)
@@ -30,10 +71,12 @@ class Role(db.Model):
     description = db.Column(db.String(255))
     permissions = db.Column(db.JSON) # Store permissions as JSON
 
-    users = db.relationship('User', backref='role', lazy=True)
+    # Never iterated; raise rather than silently lazy-load a whole collection
+    users = db.relationship('User', back_populates='role', lazy='raise')
 
 class User(UserMixin, db.Model):
     __tablename__ = 'users'
+    __table_args__ = (db.Index('ix_users_role_active', 'role_id', 'is_active'),)
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(64), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
@@ -43,11 +86,30 @@ class User(UserMixin, db.Model):
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # Every view reads current_user.role, so load it in the same SELECT
+    role = db.relationship('Role', back_populates='users', lazy='joined')
+
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = ph.hash(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        if not self.password_hash:
+            return verify_dummy_password(password)
+        password = password or ''
+        if not self.password_hash.startswith('$argon2'):
+            if not check_password_hash(self.password_hash, password):
+                return False
+        else:
+            try:
+                ph.verify(self.password_hash, password)
+            except (VerificationError, InvalidHashError):
+                return False
+            if not ph.check_needs_rehash(self.password_hash):
+                return True
+        # Legacy or outdated-parameter hash: upgrade it in place
+        self.set_password(password)
+        db.session.commit()
+        return True
 
 # --- Other Models (Simplified placeholders to match templates) ---
 class Property(db.Model):
@@ -85,18 +147,89 @@ class WorkOrder(db.Model):
     priority = db.Column(db.String(20), default='Medium')
 
 # --- Helper Functions ---
+
+# user_id -> (expires_at, detached User with role loaded). flask-login calls the
+# user loader on every request; a short TTL keeps bursts of page loads off the DB.
+USER_CACHE_TTL = 30
+USER_CACHE_MAX = 1024
+_USER_CACHE = {}
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def invalidate_cached_user(mapper, connection, target):
+    _USER_CACHE.pop(target.id, None)
+
+def verify_dummy_password(password):
+    """Burn one hash verification for an unknown user; always False."""
+    try:
+        ph.verify(DUMMY_HASH, password or '')
+    except (VerificationError, InvalidHashError):
+        pass
+    return False
+
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    user_id = int(user_id)
+    cached = _USER_CACHE.get(user_id)
+    if cached is not None and cached[0] > time.monotonic():
+        return db.session.merge(cached[1], load=False)
+
+    options = [joinedload(User.role)]
+    if app.config.get('RAISELOAD_GUARD'):
+        options.append(raiseload('*'))
+    user = (
+        db.session.query(User)
+        .options(*options)
+        .filter(User.id == user_id)
+        .first()
+    )
+    if user is None:
+        return None
+    if len(_USER_CACHE) >= USER_CACHE_MAX:
+        _USER_CACHE.clear()
+    db.session.expunge(user)
+    _USER_CACHE[user_id] = (time.monotonic() + USER_CACHE_TTL, user)
+    return db.session.merge(user, load=False)
+
+def current_role():
+    """Return the logged-in user's Role, memoized on `g` for the request."""
+    if not current_user.is_authenticated:
+        return None
+    role = getattr(g, '_role', None)
+    if role is None:
+        role = current_user.role
+        g._role = role
+    return role
+
+TEMPLATE_SETTINGS = {'APP_NAME': 'PropManager Pro V3', 'APP_VERSION': '3.0.0'}
+_YEAR_CACHE = [datetime.utcnow().year, time.monotonic()]
+
+def current_year():
+    """UTC year, re-read at most once an hour."""
+    if time.monotonic() - _YEAR_CACHE[1] > 3600:
+        _YEAR_CACHE[:] = [datetime.utcnow().year, time.monotonic()]
+    return _YEAR_CACHE[0]
 
 # Context processor to make settings available to all templates (simulating V2)
 @app.context_processor
 def inject_globals():
     return {
-        'settings': {'APP_NAME': 'PropManager Pro V3', 'APP_VERSION': '3.0.0'},
-        'current_year': datetime.utcnow().year
+        'settings': TEMPLATE_SETTINGS,
+        'current_year': current_year(),
+        'role': current_role(),
     }
 
+def insert_ignore(model, **values):
+    """INSERT that silently skips rows violating a unique constraint; returns rowcount."""
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        stmt = sqlite.insert(model).values(**values).on_conflict_do_nothing()
+    elif dialect == 'postgresql':
+        stmt = postgresql.insert(model).values(**values).on_conflict_do_nothing()
+    else:  # MySQL
+        stmt = insert(model).values(**values).prefix_with('IGNORE')
+    return db.session.execute(stmt).rowcount
+
 # --- CLI Commands ---
 @app.cli.command("init-db")
 def init_db_command():
@@ -104,22 +237,56 @@ def init_db_command():
     db.create_all()
     
     # Seed Role
-    if not Role.query.filter_by(role_name='admin').first():
-        admin_role = Role(role_name='admin', description='Administrator', permissions={'all': True})
-        db.session.add(admin_role)
-        db.session.commit()
+    if insert_ignore(Role, role_name='admin', description='Administrator', permissions={'all': True}):
         print("Created admin role.")
         
     # Seed Admin User
-    if not User.query.filter_by(username='admin').first():
-        admin_user = User(username='admin', email='admin@example.com', full_name='System Admin', role_id=1)
-        admin_user.set_password('admin123')
-        db.session.add(admin_user)
-        db.session.commit()
+    if insert_ignore(User, username='admin', email='admin@example.com', full_name='System Admin',
+                     role_id=1, password_hash=ph.hash('admin123')):
         print("Created admin user (admin/admin123).")
-    
+
+    db.session.commit()
     print("Database initialized.")
 
+@app.cli.command("check-queries")
+@click.option('--max-queries', default=3, show_default=True, help='Allowed SQL statements per page.')
+def check_queries_command(max_queries):
+    """Request every parameterless GET page as admin and report its query count."""
+    admin = User.query.filter_by(username='admin').first()
+    if not admin:
+        raise click.ClickException("No admin user; run 'flask init-db' first.")
+    app.config['RAISELOAD_GUARD'] = True
+
+    count = [0]
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        count[0] += 1
+
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(admin.id)
+        sess['_fresh'] = True
+
+    failures = []
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        for rule in app.url_map.iter_rules():
+            if 'GET' not in rule.methods or rule.arguments or rule.endpoint in ('static', 'logout'):
+                continue
+            count[0] = 0
+            # Fresh app context so g and the session start empty, as in production
+            with app.app_context():
+                resp = client.get(rule.rule)
+            print(f"{rule.rule:<15} {resp.status_code}  {count[0]} queries")
+            if count[0] > max_queries or resp.status_code >= 500:
+                failures.append(rule.rule)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+    if failures:
+        raise click.ClickException(f"Over budget or failing: {', '.join(failures)}")
+    print("All pages within query budget.")
+
 # --- Routes ---
 
 @app.route('/')
@@ -138,7 +305,12 @@ def login():
         password = request.form.get('password')
         
         user = User.query.filter_by(username=username).first()
-        if user and user.check_password(password):
+        if user is not None:
+            ok = user.check_password(password)
+        else:
+            ok = verify_dummy_password(password)
+        # Non-short-circuit '&' so both outcomes take the same path
+        if (user is not None) & ok:
             login_user(user)
             next_page = request.args.get('next')
             return redirect(next_page or url_for('dashboard'))
@@ -150,6 +322,7 @@ def login():
 @app.route('/logout')
 @login_required
 def logout():
+    _USER_CACHE.pop(current_user.id, None)
     logout_user()
     return redirect(url_for('login'))
 
@@ -157,7 +330,7 @@ def logout():
 @login_required
 def dashboard():
     # Pass 'role' to template as V2 templates expect 'user' and 'role'
-    return render_template('dashboard/index.html', user=current_user, role=current_user.role)
+    return render_template('dashboard/index.html', user=current_user, role=current_role())
 
 # Generic fallback for other pages to load their templates
 # V2 had specific routes for /properties, /tenants etc. We will map them here.
@@ -165,35 +338,35 @@ def dashboard():
 @app.route('/properties')
 @login_required
 def properties():
-    properties = Property.query.all()
-    return render_template('properties/index.html', user=current_user, role=current_user.role, properties=properties)
+    # The page loads its rows from /api/properties; the view passes no data
+    return render_template('properties/index.html', user=current_user, role=current_role())
 
 @app.route('/tenants')
 @login_required
 def tenants():
-    return render_template('tenants/index.html', user=current_user, role=current_user.role)
+    return render_template('tenants/index.html', user=current_user, role=current_role())
 
 @app.route('/leases')
 @login_required
 def leases():
-    return render_template('leasing/index.html', user=current_user, role=current_user.role)
+    return render_template('leasing/index.html', user=current_user, role=current_role())
 
 @app.route('/maintenance')
 @login_required
 def maintenance():
-    return render_template('maintenance/index.html', user=current_user, role=current_user.role)
+    return render_template('maintenance/index.html', user=current_user, role=current_role())
 
 @app.route('/reports')
 @login_required
 def reports():
-    return render_template('reports/index.html', user=current_user, role=current_user.role)
+    return render_template('reports/index.html', user=current_user, role=current_role())
 
 @app.route('/profile')
 @login_required
 def profile():
     # Attempt to render a profile or settings page if it exists in V2 templates
     # Often V2 had /settings
-    return render_template('system/settings.html', user=current_user, role=current_user.role, active_page='settings')
+    return render_template('system/settings.html', user=current_user, role=current_role(), active_page='settings')
 
 
 # Catch-all for other simple GET template routes might be tricky without listing them.
@@ -202,10 +375,21 @@ def profile():
 @app.route('/users')
 @login_required
 def users():
-    if current_user.role.role_name != 'admin':
+    role = current_role()
+    if not role or role.role_name != 'admin':
         return redirect(url_for('dashboard'))
-    users_list = User.query.all()
-    return render_template('auth/users.html', user=current_user, role=current_user.role, users=users_list)
+    # Only the displayed columns; never ship password hashes to the view
+    users_list = (
+        db.session.query(User.id, User.username, User.email, User.full_name, User.is_active, Role.role_name)
+        .outerjoin(Role, User.role_id == Role.id)
+        .all()
+    )
+    return render_template('auth/users.html', user=current_user, role=role, users=users_list)
 
 if __name__ == '__main__':
-    app.run(debug=True)
+    if DEV_SERVER:
+        app.run(debug=True)
+    else:
+        from gevent.pywsgi import WSGIServer
+        port = int(os.environ.get('PORT', 8000))
+        WSGIServer(('0.0.0.0', port), app).serve_forever()
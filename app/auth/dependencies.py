@@ -1,21 +1,70 @@
 """Auth dependencies – JWT token validation, role checks."""
+import hashlib
+import hmac
 import logging
+import time
 from datetime import datetime, timedelta
-from typing import Optional, List
+from typing import Annotated, Any, Callable, NamedTuple, Optional, List
 from fastapi import Depends, HTTPException, status, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import JWTError, jwt
+from jose import JWTError, jwk, jwt
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import event
+from sqlalchemy.orm import Session, joinedload
 from app.database import get_db
 from app.config import get_settings
 from app.auth.models import UserAccount, Role
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["pbkdf2_sha256"],
+    deprecated="auto",
+    pbkdf2_sha256__default_rounds=settings.PASSWORD_HASH_ROUNDS,
+    pbkdf2_sha256__min_desired_rounds=settings.PASSWORD_HASH_ROUNDS,
+)
 security = HTTPBearer(auto_error=False)
 
+# Built once: asymmetric keys are parsed from PEM here rather than per request
+_JWT_ALGORITHMS = [settings.ALGORITHM]
+_JWT_DECODE_KEY = (
+    settings.SECRET_KEY if settings.ALGORITHM.startswith("HS")
+    else jwk.construct(settings.SECRET_KEY, settings.ALGORITHM)
+)
+_JWT_DECODE_OPTIONS = {"require_exp": True, "require_sub": True, "verify_aud": False}
+
+# blake2b(token) -> (monotonic expiry, user id). Skips signature verification
+# for tokens seen recently; entries never outlive the token itself.
+_TOKEN_CACHE_TTL = 60
+_TOKEN_CACHE_MAX = 4096
+_TOKEN_CACHE: dict[bytes, tuple[float, int]] = {}
+
+# user_id -> (monotonic expiry, detached active user with its role loaded).
+# Skips the user SELECT on most authenticated requests; cleared on any local
+# user/role write, and the short TTL bounds staleness across workers.
+_USER_CACHE_TTL = 30
+_USER_CACHE_MAX = 4096
+_USER_CACHE: dict[int, tuple[float, UserAccount]] = {}
+
+# role_id -> (updated_at, normalized permissions); roles change rarely
+_PERMS_CACHE: dict[int, tuple[Optional[datetime], dict]] = {}
+
+
+class RoleSnapshot(NamedTuple):
+    """Read-only copy of a Role row, safe to share across sessions."""
+    id: int
+    role_name: str
+    permissions: Any
+    is_active: bool
+    updated_at: Optional[datetime]
+
+
+# role_id -> (monotonic expiry, snapshot). Local updates invalidate at once;
+# the TTL bounds staleness for changes made by other workers.
+_ROLE_CACHE_TTL = 300
+_ROLE_CACHE: dict[int, tuple[float, RoleSnapshot]] = {}
+
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
@@ -23,6 +72,124 @@ def hash_password(password: str) -> str:
 def verify_password(plain: str, hashed: str) -> bool:
     return pwd_context.verify(plain, hashed)
 
+# Checked against when the username is unknown, so that path costs the same
+# as a wrong password and response times don't reveal which accounts exist
+_DUMMY_PASSWORD_HASH = pwd_context.hash("not-a-real-password")
+
+def verify_dummy_password(plain: str) -> bool:
+    """Burn one full hash verification; always False."""
+    pwd_context.verify(plain, _DUMMY_PASSWORD_HASH)
+    return False
+
+def verify_and_update_password(plain: str, hashed: str) -> tuple[bool, Optional[str]]:
+    """Verify a password; also returns a new hash if the stored one is below the configured cost."""
+    return pwd_context.verify_and_update(plain, hashed)
+
+def decode_access_token(token: str) -> dict:
+    """Verify a bearer token and return its claims; raises JWTError if invalid."""
+    return jwt.decode(token, _JWT_DECODE_KEY, algorithms=_JWT_ALGORITHMS, options=_JWT_DECODE_OPTIONS)
+
+
+def _token_cache_key(token: str) -> bytes:
+    return hashlib.blake2b(token.encode("utf-8"), digest_size=16).digest()
+
+
+def _token_user_id(token: str) -> Optional[int]:
+    """User id carried by a valid token, or None; verified tokens are cached briefly."""
+    key = _token_cache_key(token)
+    now = time.monotonic()
+    cached = _TOKEN_CACHE.get(key)
+    if cached is not None and cached[0] > now:
+        return cached[1]
+    try:
+        payload = decode_access_token(token)
+        user_id = int(payload["sub"])
+    except JWTError as e:
+        logger.debug("JWT Error: %s", e)
+        return None
+    except (KeyError, ValueError, TypeError):
+        return None
+    logger.debug("Token payload user_id: %s", user_id)
+    ttl = min(_TOKEN_CACHE_TTL, payload["exp"] - time.time())
+    if ttl > 0:
+        if len(_TOKEN_CACHE) >= _TOKEN_CACHE_MAX:
+            _TOKEN_CACHE.clear()
+        _TOKEN_CACHE[key] = (now + ttl, user_id)
+    return user_id
+
+
+def forget_token(token: Optional[str]) -> None:
+    """Drop a token from the verification cache (e.g. on logout)."""
+    if token:
+        _TOKEN_CACHE.pop(_token_cache_key(token), None)
+
+
+def _snapshot_role(role: Role) -> RoleSnapshot:
+    return RoleSnapshot(role.id, role.role_name, role.permissions, role.is_active, role.updated_at)
+
+
+def prime_role_cache(db: Session) -> None:
+    """Load every role into the cache with one query (called at startup)."""
+    expires = time.monotonic() + _ROLE_CACHE_TTL
+    for role in db.query(Role).all():
+        _ROLE_CACHE[role.id] = (expires, _snapshot_role(role))
+
+
+def get_cached_role(db: Session, role_id: Optional[int]) -> Optional[RoleSnapshot]:
+    """Role by id from the in-process cache, querying only on a miss."""
+    if role_id is None:
+        return None
+    now = time.monotonic()
+    cached = _ROLE_CACHE.get(role_id)
+    if cached is not None and cached[0] > now:
+        return cached[1]
+    role = db.get(Role, role_id)
+    if role is None:
+        return None
+    snapshot = _snapshot_role(role)
+    _ROLE_CACHE[role_id] = (now + _ROLE_CACHE_TTL, snapshot)
+    return snapshot
+
+
+def _cached_active_user(db: Session, user_id: int) -> Optional[UserAccount]:
+    """Fresh cached user attached to `db` without any SQL, or None on a miss."""
+    cached = _USER_CACHE.get(user_id)
+    if cached is not None and cached[0] > time.monotonic():
+        return db.merge(cached[1], load=False)
+    return None
+
+
+def _load_active_user(db: Session, user_id: int) -> Optional[UserAccount]:
+    """Active user (role joined) attached to `db`, served from the user cache when fresh."""
+    user = _cached_active_user(db, user_id)
+    if user is not None:
+        return user
+    user = (
+        db.query(UserAccount)
+        .options(joinedload(UserAccount.role))
+        .filter(UserAccount.id == user_id, UserAccount.is_active == True)
+        .first()
+    )
+    if user is None:
+        return None
+    if len(_USER_CACHE) >= _USER_CACHE_MAX:
+        _USER_CACHE.clear()
+    db.expunge(user)
+    _USER_CACHE[user_id] = (time.monotonic() + _USER_CACHE_TTL, user)
+    return db.merge(user, load=False)
+
+
+def forget_user(user_id: int) -> None:
+    """Drop a user from the auth cache; needed after bulk UPDATE/DELETE, which skip ORM events."""
+    _USER_CACHE.pop(user_id, None)
+
+
+@event.listens_for(UserAccount, "after_update")
+@event.listens_for(UserAccount, "after_delete")
+def _invalidate_cached_user(mapper, connection, target):
+    _USER_CACHE.pop(target.id, None)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
@@ -50,27 +217,15 @@ async def get_current_user_from_token(
         request.state._current_user = None
         request.state._current_user_loaded = True
         return None
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        user_id = payload.get("sub")
-        logger.debug("Token payload user_id: %s", user_id)
-        if user_id is None:
-            request.state._current_user = None
-            request.state._current_user_loaded = True
-            return None
-    except JWTError as e:
-        logger.debug("JWT Error: %s", e)
-        request.state._current_user = None
-        request.state._current_user_loaded = True
-        return None
-
-    try:
-        user_id_int = int(user_id)
-    except (ValueError, TypeError):
-        request.state._current_user = None
-        request.state._current_user_loaded = True
-        return None
-    user = db.query(UserAccount).filter(UserAccount.id == user_id_int, UserAccount.is_active == True).first()
+    user_id_int = _token_user_id(token)
+    if user_id_int is None:
+        request.state._current_user = None
+        request.state._current_user_loaded = True
+        return None
+    user = _cached_active_user(db, user_id_int)
+    if user is None:
+        # Cache miss queries the database; keep that blocking call off the event loop
+        user = await run_in_threadpool(_load_active_user, db, user_id_int)
     logger.debug("User found: %s", user.username if user else None)
     request.state._current_user = user
     request.state._current_user_loaded = True
@@ -78,30 +233,34 @@ async def get_current_user_from_token(
 
 
 async def get_current_user(
-    request: Request,
-    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
-    db: Session = Depends(get_db),
+    user: Optional[UserAccount] = Depends(get_current_user_from_token),
 ) -> UserAccount:
-    user = await get_current_user_from_token(request, credentials, db)
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
     return user
 
 
-def require_roles(allowed_roles: List[str]):
-    async def role_checker(
-        request: Request,
-        credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
-        db: Session = Depends(get_db),
-    ):
-        user = await get_current_user(request, credentials, db)
-        role = _get_current_role(request, db, user.role_id)
-        if not role or role.role_name not in allowed_roles:
+# Shared sub-dependency: FastAPI resolves it once per request however many
+# dependencies (get_current_user, require_roles, require_permissions) need it.
+CurrentUser = Annotated[UserAccount, Depends(get_current_user)]
+
+
+def require_roles(allowed_roles: List[str]):
+    async def role_checker(request: Request, user: CurrentUser):
+        role = _get_current_role(request, user)
+        if not role or not any(_names_equal(role.role_name, allowed) for allowed in allowed_roles):
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient permissions")
         return user
     return role_checker
 
 
+def _names_equal(a: Optional[str], b: str) -> bool:
+    """Constant-time string equality for role checks on the auth path."""
+    if a is None:
+        return False
+    return hmac.compare_digest(a.encode("utf-8"), b.encode("utf-8"))
+
+
 def _normalize_permissions(perms) -> dict:
     if perms is None:
         return {}
@@ -112,18 +271,47 @@ def _normalize_permissions(perms) -> dict:
     return {}
 
 
-def _has_permission(perms: dict, required: str) -> bool:
-    if perms.get(required) is True:
-        return True
+def _permission_keys(required: str) -> tuple[str, ...]:
+    """Keys that grant `required`: itself plus its ':' and '.' base scopes."""
+    keys = [required]
     if ":" in required:
-        base = required.split(":", 1)[0]
-        if perms.get(base) is True:
-            return True
+        keys.append(required.split(":", 1)[0])
     if "." in required:
-        base = required.split(".", 1)[0]
-        if perms.get(base) is True:
-            return True
-    return False
+        keys.append(required.split(".", 1)[0])
+    return tuple(dict.fromkeys(keys))
+
+
+def _compile_permission_check(checks: tuple[tuple[str, ...], ...]) -> Callable[[dict], bool]:
+    """Generate a straight-line `perms -> bool` test for a fixed set of keys.
+
+    The keys come from decorator arguments, never from requests, and are
+    embedded with repr() so the generated source is always well-formed.
+    """
+    keys = dict.fromkeys(("all",) + tuple(key for group in checks for key in group))
+    body = " or ".join(f"get({key!r}) is True" for key in keys)
+    src = f"def check(perms):\n    get = perms.get\n    return {body}\n"
+    namespace: dict = {}
+    exec(compile(src, "<permission-check>", "exec"), namespace)
+    return namespace["check"]
+
+
+def _normalize_permissions_for_role(role: Role | RoleSnapshot) -> dict:
+    """Normalized permissions for a role, cached until the row is updated."""
+    cached = _PERMS_CACHE.get(role.id)
+    if cached is not None and cached[0] == role.updated_at:
+        return cached[1]
+    perms = dict(_normalize_permissions(role.permissions))
+    _PERMS_CACHE[role.id] = (role.updated_at, perms)
+    return perms
+
+
+@event.listens_for(Role, "after_update")
+@event.listens_for(Role, "after_delete")
+def _invalidate_role_caches(mapper, connection, target):
+    _PERMS_CACHE.pop(target.id, None)
+    _ROLE_CACHE.pop(target.id, None)
+    # Cached users carry their role
+    _USER_CACHE.clear()
 
 
 def require_permissions(required: List[str] | str):
@@ -131,31 +319,29 @@ def require_permissions(required: List[str] | str):
         required_list = [required]
     else:
         required_list = list(required)
+    # Split and specialize once here rather than on every request
+    checks = tuple(_permission_keys(r) for r in required_list)
+    has_permission = _compile_permission_check(checks)
 
-    async def permission_checker(
-        request: Request,
-        credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
-        db: Session = Depends(get_db),
-    ):
-        user = await get_current_user(request, credentials, db)
-        role = _get_current_role(request, db, user.role_id)
+    async def permission_checker(request: Request, user: CurrentUser):
+        role = _get_current_role(request, user)
         if not role:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient permissions")
-        perms = _normalize_permissions(role.permissions)
-        if role.role_name == "admin" or perms.get("all") is True:
+        perms = _normalize_permissions_for_role(role)
+        if _names_equal(role.role_name, "admin") or has_permission(perms):
             return user
-        for req in required_list:
-            if _has_permission(perms, req):
-                return user
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient permissions")
 
     return permission_checker
 
 
-def _get_current_role(request: Request, db: Session, role_id: int) -> Optional[Role]:
+def _get_current_role(request: Request, user: UserAccount) -> Optional[Role]:
     cached_role = getattr(request.state, "_current_role", None)
-    if cached_role and cached_role.id == role_id:
+    if cached_role and cached_role.id == user.role_id:
         return cached_role
-    role = db.query(Role).filter(Role.id == role_id, Role.is_active == True).first()
+    # Joined in by get_current_user_from_token, so normally no extra query
+    role = user.role
+    if role is not None and not role.is_active:
+        role = None
     request.state._current_role = role
     return role
@@ -1,6 +1,7 @@
 """Auth models – UserAccount, Role, AuditLog."""
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, JSON, Index, text
 from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
 from app.database import Base
 
 
@@ -18,6 +19,14 @@ class Role(Base):
 
 class UserAccount(Base):
     __tablename__ = "user_accounts"
+    __table_args__ = (
+        # Token resolution filters on id AND is_active
+        Index("ix_user_accounts_active_id", "id",
+              postgresql_where=text("is_active"), sqlite_where=text("is_active = 1")),
+        Index("ix_user_accounts_role_active", "role_id", "is_active"),
+        # Keyset pagination of list_users filtered by role
+        Index("ix_user_accounts_role_id_id", "role_id", "id"),
+    )
     id = Column(Integer, primary_key=True, autoincrement=True)
     username = Column(String(100), unique=True, nullable=False, index=True)
     email = Column(String(255), unique=True, nullable=False, index=True)
@@ -33,6 +42,8 @@ class UserAccount(Base):
     avatar_url = Column(String(500))
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    # Must be eager-loaded explicitly (joinedload) where it is needed
+    role = relationship("Role", lazy="raise")
 
 
 class AuditLog(Base):
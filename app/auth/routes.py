@@ -1,21 +1,27 @@
 """Auth API routes – login, register, user management."""
-from fastapi import APIRouter, Depends, HTTPException, status, Response, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Response, Request
 from fastapi.responses import RedirectResponse
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, event, exists, func, select, update
+from sqlalchemy.orm import Session, joinedload
 from sqlalchemy.exc import IntegrityError
 from datetime import datetime
-from typing import Any
+from typing import Any, Callable, NamedTuple
 from app.database import get_db
 from app.auth.models import UserAccount, Role
-from app.auth.schemas import LoginRequest, TokenResponse, UserCreate, UserResponse, UserUpdate
+from app.auth.schemas import LoginRequest, TokenResponse, UserCreate, UserPage, UserResponse, UserUpdate
 from app.modules.properties.models import TenantOrg, Tenant, Owner, Vendor, StaffUser
+from app.utils.integrity_service import conflict_detail
 from app.auth.dependencies import (
     hash_password,
-    verify_password,
+    verify_and_update_password,
+    verify_dummy_password,
     create_access_token,
     get_current_user,
     get_current_user_from_token,
+    get_cached_role,
     require_permissions,
+    forget_token,
+    forget_user,
 )
 
 router = APIRouter(prefix="/api/auth", tags=["Authentication"])
@@ -44,37 +50,200 @@ def _resolve_tenant_org_id(req: UserCreate, current_user: UserAccount | None, db
     if current_user and current_user.tenant_org_id:
         return current_user.tenant_org_id
 
-    org = db.query(TenantOrg).order_by(TenantOrg.id.asc()).first()
-    if not org:
+    org_id = _default_tenant_org_id(db)
+    if org_id is None:
         raise HTTPException(status_code=422, detail="No tenant organization configured")
-    return org.id
+    return org_id
+
+
+# Lowest org id, the fallback org for registrations; None until first looked up
+_DEFAULT_TENANT_ORG_ID: int | None = None
+
+
+def _default_tenant_org_id(db: Session) -> int | None:
+    global _DEFAULT_TENANT_ORG_ID
+    if _DEFAULT_TENANT_ORG_ID is None:
+        _DEFAULT_TENANT_ORG_ID = db.query(func.min(TenantOrg.id)).scalar()
+    return _DEFAULT_TENANT_ORG_ID
+
+
+@event.listens_for(TenantOrg, "after_insert")
+@event.listens_for(TenantOrg, "after_delete")
+def _invalidate_default_tenant_org(mapper, connection, target):
+    global _DEFAULT_TENANT_ORG_ID
+    _DEFAULT_TENANT_ORG_ID = None
 
 
 @router.post("/login", response_model=TokenResponse)
 def login(req: LoginRequest, response: Response, db: Session = Depends(get_db)):
-    user = db.query(UserAccount).filter(UserAccount.username == req.username).first()
-    if not user or not verify_password(req.password, user.password_hash):
+    user = (
+        db.query(UserAccount)
+        .options(joinedload(UserAccount.role))
+        .filter(UserAccount.username == req.username)
+        .first()
+    )
+    # Hand the connection back to the pool while the (deliberately slow)
+    # password check runs; the loaded user stays usable once detached.
+    db.close()
+    if not user:
+        verify_dummy_password(req.password)
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    valid, new_hash = verify_and_update_password(req.password, user.password_hash)
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     if not user.is_active:
         raise HTTPException(status_code=403, detail="Account disabled")
+    role_name = user.role.role_name if user.role else None
+    if new_hash:
+        user.password_hash = new_hash
     user.last_login_at = datetime.utcnow()
+    db.add(user)
     db.commit()
-    role = db.query(Role).filter(Role.id == user.role_id).first()
-    token = create_access_token({"sub": str(user.id), "role": role.role_name if role else "viewer"})
+    token = create_access_token({"sub": str(user.id), "role": role_name or "viewer"})
     response.set_cookie("access_token", token, httponly=True, max_age=28800, samesite="lax")
     return TokenResponse(
         access_token=token,
-        user=UserResponse(
-            id=user.id, username=user.username, email=user.email,
-            full_name=user.full_name, role_id=user.role_id,
-            role_name=role.role_name if role else None,
-            linked_entity_type=user.linked_entity_type,
-            is_active=user.is_active, last_login_at=user.last_login_at,
-            avatar_url=user.avatar_url,
-        ),
+        user=UserResponse.from_user(user, role_name),
     )
 
 
+def _full_name(profile: dict) -> str | None:
+    return " ".join(part for part in [profile.get("first_name"), profile.get("last_name")] if part) or None
+
+
+def _create_tenant(db: Session, req: UserCreate, profile: dict, tenant_org_id: int) -> int:
+    tenant_code = profile.get("tenant_code")
+    first_name = profile.get("first_name")
+    if not tenant_code or not first_name:
+        raise HTTPException(status_code=422, detail="Tenant profile requires tenant_code and first_name")
+    tenant = Tenant(
+        tenant_org_id=tenant_org_id,
+        tenant_code=tenant_code,
+        tenant_type=profile.get("tenant_type") or "Individual",
+        first_name=first_name,
+        last_name=profile.get("last_name"),
+        company_name=profile.get("company_name"),
+        email=profile.get("email") or req.email,
+        phone=profile.get("phone"),
+        id_type=profile.get("id_type"),
+        id_number=profile.get("id_number"),
+        status="Active",
+    )
+    db.add(tenant)
+    db.flush()
+    return tenant.id
+
+
+def _create_owner(db: Session, req: UserCreate, profile: dict, tenant_org_id: int) -> int:
+    owner_code = profile.get("owner_code")
+    owner_type_raw = (profile.get("owner_type") or "Individual").lower()
+    owner_type = "Corporate" if owner_type_raw == "corporate" else "Individual"
+    first_name = profile.get("first_name")
+    company_name = profile.get("company_name")
+    if not owner_code:
+        raise HTTPException(status_code=422, detail="Owner profile requires owner_code")
+    if owner_type == "Corporate" and not company_name:
+        raise HTTPException(status_code=422, detail="Corporate owner requires company_name")
+    if owner_type != "Corporate" and not first_name:
+        raise HTTPException(status_code=422, detail="Individual owner requires first_name")
+    owner = Owner(
+        tenant_org_id=tenant_org_id,
+        owner_code=owner_code,
+        owner_type=owner_type,
+        first_name=first_name,
+        last_name=profile.get("last_name"),
+        company_name=company_name,
+        email=profile.get("email") or req.email,
+        phone=profile.get("phone"),
+        tax_id=profile.get("tax_id"),
+        status="Active",
+    )
+    db.add(owner)
+    db.flush()
+    return owner.id
+
+
+def _create_vendor(db: Session, req: UserCreate, profile: dict, tenant_org_id: int) -> int:
+    vendor_code = profile.get("vendor_code")
+    company_name = profile.get("company_name")
+    if not vendor_code or not company_name:
+        raise HTTPException(status_code=422, detail="Vendor profile requires vendor_code and company_name")
+    vendor = Vendor(
+        tenant_org_id=tenant_org_id,
+        vendor_code=vendor_code,
+        company_name=company_name,
+        contact_person=profile.get("contact_person"),
+        email=profile.get("email") or req.email,
+        phone=profile.get("phone"),
+        service_category=profile.get("service_category"),
+        license_number=profile.get("license_number"),
+        status="Active",
+    )
+    db.add(vendor)
+    db.flush()
+    return vendor.id
+
+
+def _create_staff(db: Session, req: UserCreate, profile: dict, tenant_org_id: int) -> int:
+    employee_code = profile.get("employee_code")
+    first_name = profile.get("first_name")
+    if not employee_code or not first_name:
+        raise HTTPException(status_code=422, detail="Staff profile requires employee_code and first_name")
+    staff = StaffUser(
+        tenant_org_id=tenant_org_id,
+        employee_code=employee_code,
+        first_name=first_name,
+        last_name=profile.get("last_name"),
+        email=profile.get("email") or req.email,
+        phone=profile.get("phone"),
+        role_id=req.role_id,
+        department=profile.get("department"),
+        status="Active",
+    )
+    db.add(staff)
+    db.flush()
+    return staff.id
+
+
+class _EntityLink(NamedTuple):
+    """How a role's user account links to (or creates) its profile entity."""
+    entity_type: str
+    model: type
+    noun: str  # in "Cross-org ... link denied"
+    missing_detail: str
+    create: Callable[[Session, UserCreate, dict, int], int]
+    default_full_name: Callable[[dict], str]
+
+
+_TENANT_LINK = _EntityLink(
+    "Tenant", Tenant, "tenant", "Linked tenant not found", _create_tenant,
+    lambda profile: _full_name(profile) or "Tenant User",
+)
+_OWNER_LINK = _EntityLink(
+    "Owner", Owner, "owner", "Linked owner not found", _create_owner,
+    lambda profile: profile.get("company_name") or _full_name(profile) or "Owner User",
+)
+_VENDOR_LINK = _EntityLink(
+    "Vendor", Vendor, "vendor", "Linked vendor not found", _create_vendor,
+    lambda profile: profile.get("company_name") or "Vendor User",
+)
+_STAFF_LINK = _EntityLink(
+    "Staff", StaffUser, "staff", "Linked staff profile not found", _create_staff,
+    lambda profile: _full_name(profile) or "Staff User",
+)
+
+# Lower-cased role name -> entity link; other roles register without one
+_ROLE_LINKS = {
+    "tenant": _TENANT_LINK,
+    "owner": _OWNER_LINK,
+    "vendor": _VENDOR_LINK,
+    "admin": _STAFF_LINK,
+    "manager": _STAFF_LINK,
+    "accountant": _STAFF_LINK,
+    "support": _STAFF_LINK,
+}
+
+
 @router.post("/register", response_model=UserResponse, status_code=201)
 def register(
     req: UserCreate,
@@ -82,18 +251,18 @@ def register(
     current_user: UserAccount | None = Depends(get_current_user_from_token),
 ):
     # Allow open registration only for initial bootstrap.
-    if db.query(UserAccount).count() > 0 and (not current_user or current_user.role_id != 1):
+    bootstrapped = db.execute(select(exists().select_from(UserAccount))).scalar()
+    if bootstrapped and (not current_user or current_user.role_id != 1):
         raise HTTPException(status_code=403, detail="Forbidden: Admin access required")
-    if db.query(UserAccount).filter((UserAccount.username == req.username) | (UserAccount.email == req.email)).first():
-        raise HTTPException(status_code=409, detail="Username or email already exists")
 
-    role = db.query(Role).filter(Role.id == req.role_id, Role.is_active == True).first()
-    if not role:
+    role = get_cached_role(db, req.role_id)
+    if not role or not role.is_active:
         raise HTTPException(status_code=422, detail="Invalid or inactive role")
 
     if req.profile is not None and not isinstance(req.profile, dict):
         raise HTTPException(status_code=422, detail="profile must be an object")
-    profile = req.profile or {}
+    # Normalized once; the entity link helpers only read from it
+    profile = {key: _clean_text(value) for key, value in (req.profile or {}).items()}
 
     tenant_org_id = _resolve_tenant_org_id(req, current_user, db)
     role_name = (role.role_name or "").lower()
@@ -103,173 +272,24 @@ def register(
     full_name = _clean_text(req.full_name)
 
     try:
-        if role_name == "tenant":
-            if linked_entity_type and linked_entity_type != "Tenant":
-                raise HTTPException(status_code=422, detail="tenant role must link to Tenant")
-            if linked_entity_id:
-                tenant = db.query(Tenant).filter(Tenant.id == linked_entity_id, Tenant.is_deleted == False).first()
-                if not tenant:
-                    raise HTTPException(status_code=404, detail="Linked tenant not found")
-                if tenant_org_id and tenant.tenant_org_id != tenant_org_id:
-                    raise HTTPException(status_code=403, detail="Cross-org tenant link denied")
-            else:
-                tenant_code = _clean_text(profile.get("tenant_code"))
-                first_name = _clean_text(profile.get("first_name"))
-                if not tenant_code or not first_name:
-                    raise HTTPException(status_code=422, detail="Tenant profile requires tenant_code and first_name")
-                existing = db.query(Tenant).filter(
-                    Tenant.tenant_org_id == tenant_org_id,
-                    Tenant.tenant_code == tenant_code,
-                    Tenant.is_deleted == False,
-                ).first()
-                if existing:
-                    raise HTTPException(status_code=409, detail="Tenant code already exists")
-                tenant = Tenant(
-                    tenant_org_id=tenant_org_id,
-                    tenant_code=tenant_code,
-                    tenant_type=_clean_text(profile.get("tenant_type")) or "Individual",
-                    first_name=first_name,
-                    last_name=_clean_text(profile.get("last_name")),
-                    company_name=_clean_text(profile.get("company_name")),
-                    email=_clean_text(profile.get("email")) or req.email,
-                    phone=_clean_text(profile.get("phone")),
-                    id_type=_clean_text(profile.get("id_type")),
-                    id_number=_clean_text(profile.get("id_number")),
-                    status="Active",
-                )
-                db.add(tenant)
-                db.flush()
-                linked_entity_id = tenant.id
-            linked_entity_type = "Tenant"
-            if not full_name:
-                full_name = " ".join(part for part in [_clean_text(profile.get("first_name")), _clean_text(profile.get("last_name"))] if part) or "Tenant User"
-
-        elif role_name == "owner":
-            if linked_entity_type and linked_entity_type != "Owner":
-                raise HTTPException(status_code=422, detail="owner role must link to Owner")
-            if linked_entity_id:
-                owner = db.query(Owner).filter(Owner.id == linked_entity_id, Owner.is_deleted == False).first()
-                if not owner:
-                    raise HTTPException(status_code=404, detail="Linked owner not found")
-                if tenant_org_id and owner.tenant_org_id != tenant_org_id:
-                    raise HTTPException(status_code=403, detail="Cross-org owner link denied")
-            else:
-                owner_code = _clean_text(profile.get("owner_code"))
-                owner_type_raw = (_clean_text(profile.get("owner_type")) or "Individual").lower()
-                owner_type = "Corporate" if owner_type_raw == "corporate" else "Individual"
-                first_name = _clean_text(profile.get("first_name"))
-                last_name = _clean_text(profile.get("last_name"))
-                company_name = _clean_text(profile.get("company_name"))
-                if not owner_code:
-                    raise HTTPException(status_code=422, detail="Owner profile requires owner_code")
-                if owner_type == "Corporate" and not company_name:
-                    raise HTTPException(status_code=422, detail="Corporate owner requires company_name")
-                if owner_type != "Corporate" and not first_name:
-                    raise HTTPException(status_code=422, detail="Individual owner requires first_name")
-                existing = db.query(Owner).filter(
-                    Owner.tenant_org_id == tenant_org_id,
-                    Owner.owner_code == owner_code,
-                    Owner.is_deleted == False,
-                ).first()
-                if existing:
-                    raise HTTPException(status_code=409, detail="Owner code already exists")
-                owner = Owner(
-                    tenant_org_id=tenant_org_id,
-                    owner_code=owner_code,
-                    owner_type=owner_type,
-                    first_name=first_name,
-                    last_name=last_name,
-                    company_name=company_name,
-                    email=_clean_text(profile.get("email")) or req.email,
-                    phone=_clean_text(profile.get("phone")),
-                    tax_id=_clean_text(profile.get("tax_id")),
-                    status="Active",
-                )
-                db.add(owner)
-                db.flush()
-                linked_entity_id = owner.id
-            linked_entity_type = "Owner"
-            if not full_name:
-                full_name = _clean_text(profile.get("company_name")) or " ".join(
-                    part for part in [_clean_text(profile.get("first_name")), _clean_text(profile.get("last_name"))] if part
-                ) or "Owner User"
-
-        elif role_name == "vendor":
-            if linked_entity_type and linked_entity_type != "Vendor":
-                raise HTTPException(status_code=422, detail="vendor role must link to Vendor")
-            if linked_entity_id:
-                vendor = db.query(Vendor).filter(Vendor.id == linked_entity_id, Vendor.is_deleted == False).first()
-                if not vendor:
-                    raise HTTPException(status_code=404, detail="Linked vendor not found")
-                if tenant_org_id and vendor.tenant_org_id != tenant_org_id:
-                    raise HTTPException(status_code=403, detail="Cross-org vendor link denied")
-            else:
-                vendor_code = _clean_text(profile.get("vendor_code"))
-                company_name = _clean_text(profile.get("company_name"))
-                if not vendor_code or not company_name:
-                    raise HTTPException(status_code=422, detail="Vendor profile requires vendor_code and company_name")
-                existing = db.query(Vendor).filter(
-                    Vendor.tenant_org_id == tenant_org_id,
-                    Vendor.vendor_code == vendor_code,
-                    Vendor.is_deleted == False,
-                ).first()
-                if existing:
-                    raise HTTPException(status_code=409, detail="Vendor code already exists")
-                vendor = Vendor(
-                    tenant_org_id=tenant_org_id,
-                    vendor_code=vendor_code,
-                    company_name=company_name,
-                    contact_person=_clean_text(profile.get("contact_person")),
-                    email=_clean_text(profile.get("email")) or req.email,
-                    phone=_clean_text(profile.get("phone")),
-                    service_category=_clean_text(profile.get("service_category")),
-                    license_number=_clean_text(profile.get("license_number")),
-                    status="Active",
-                )
-                db.add(vendor)
-                db.flush()
-                linked_entity_id = vendor.id
-            linked_entity_type = "Vendor"
-            if not full_name:
-                full_name = _clean_text(profile.get("company_name")) or "Vendor User"
-
-        elif role_name in {"admin", "manager", "accountant", "support"}:
-            if linked_entity_type and linked_entity_type != "Staff":
-                raise HTTPException(status_code=422, detail=f"{role_name} role must link to Staff")
+        link = _ROLE_LINKS.get(role_name)
+        if link is not None:
+            if linked_entity_type and linked_entity_type != link.entity_type:
+                raise HTTPException(status_code=422, detail=f"{role_name} role must link to {link.entity_type}")
             if linked_entity_id:
-                staff = db.query(StaffUser).filter(StaffUser.id == linked_entity_id).first()
-                if not staff:
-                    raise HTTPException(status_code=404, detail="Linked staff profile not found")
-                if tenant_org_id and staff.tenant_org_id != tenant_org_id:
-                    raise HTTPException(status_code=403, detail="Cross-org staff link denied")
+                q = db.query(link.model).filter(link.model.id == linked_entity_id)
+                if hasattr(link.model, "is_deleted"):
+                    q = q.filter(link.model.is_deleted == False)
+                entity = q.first()
+                if not entity:
+                    raise HTTPException(status_code=404, detail=link.missing_detail)
+                if tenant_org_id and entity.tenant_org_id != tenant_org_id:
+                    raise HTTPException(status_code=403, detail=f"Cross-org {link.noun} link denied")
             else:
-                employee_code = _clean_text(profile.get("employee_code"))
-                first_name = _clean_text(profile.get("first_name"))
-                if not employee_code or not first_name:
-                    raise HTTPException(status_code=422, detail="Staff profile requires employee_code and first_name")
-                existing = db.query(StaffUser).filter(
-                    StaffUser.tenant_org_id == tenant_org_id,
-                    StaffUser.employee_code == employee_code,
-                ).first()
-                if existing:
-                    raise HTTPException(status_code=409, detail="Employee code already exists")
-                staff = StaffUser(
-                    tenant_org_id=tenant_org_id,
-                    employee_code=employee_code,
-                    first_name=first_name,
-                    last_name=_clean_text(profile.get("last_name")),
-                    email=_clean_text(profile.get("email")) or req.email,
-                    phone=_clean_text(profile.get("phone")),
-                    role_id=req.role_id,
-                    department=_clean_text(profile.get("department")),
-                    status="Active",
-                )
-                db.add(staff)
-                db.flush()
-                linked_entity_id = staff.id
-            linked_entity_type = "Staff"
+                linked_entity_id = link.create(db, req, profile, tenant_org_id)
+            linked_entity_type = link.entity_type
             if not full_name:
-                full_name = " ".join(part for part in [_clean_text(profile.get("first_name")), _clean_text(profile.get("last_name"))] if part) or "Staff User"
+                full_name = link.default_full_name(profile)
 
         user = UserAccount(
             username=req.username,
@@ -285,62 +305,70 @@ def register(
         db.commit()
     except IntegrityError as exc:
         db.rollback()
-        raise HTTPException(status_code=409, detail=f"Registration failed: {exc.orig}") from exc
+        detail = conflict_detail(exc, "Registration conflicts with an existing record")
+        if detail is None:
+            raise
+        raise HTTPException(status_code=409, detail=detail) from exc
 
     db.refresh(user)
-    return UserResponse(
-        id=user.id, username=user.username, email=user.email,
-        full_name=user.full_name, role_id=user.role_id,
-        role_name=role.role_name if role else None,
-        linked_entity_type=user.linked_entity_type,
-        is_active=user.is_active, last_login_at=user.last_login_at,
-        avatar_url=user.avatar_url,
-    )
+    return UserResponse.from_user(user, role.role_name if role else None)
 
 
 @router.get("/me", response_model=UserResponse)
-def get_me(user: UserAccount = Depends(get_current_user), db: Session = Depends(get_db)):
-    role = db.query(Role).filter(Role.id == user.role_id).first()
-    return UserResponse(
-        id=user.id, username=user.username, email=user.email,
-        full_name=user.full_name, role_id=user.role_id,
-        role_name=role.role_name if role else None,
-        linked_entity_type=user.linked_entity_type,
-        is_active=user.is_active, last_login_at=user.last_login_at,
-        avatar_url=user.avatar_url,
-    )
+def get_me(user: UserAccount = Depends(get_current_user)):
+    role = user.role  # joined in by the auth dependency
+    return UserResponse.from_user(user, role.role_name if role else None)
+
+
+def _forget_request_tokens(request: Request) -> None:
+    forget_token(request.cookies.get("access_token"))
+    auth_header = request.headers.get("Authorization", "")
+    if auth_header.startswith("Bearer "):
+        forget_token(auth_header[7:])
 
 
 @router.post("/logout")
-def logout_post(response: Response):
+def logout_post(request: Request, response: Response):
+    _forget_request_tokens(request)
     response.delete_cookie("access_token")
     return {"message": "Logged out"}
 
 
 @router.get("/logout")
-def logout_get(response: Response):
+def logout_get(request: Request, response: Response):
+    _forget_request_tokens(request)
     response.delete_cookie("access_token")
     return RedirectResponse(url="/login", status_code=302)
 
 
-@router.get("/users", response_model=list[UserResponse])
+@router.get("/users", response_model=UserPage)
 def list_users(
+    cursor: int | None = Query(None, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    role_id: int | None = None,
     db: Session = Depends(get_db),
     current_user: UserAccount = Depends(require_permissions(["admin", "users"])),
 ):
-    users = db.query(UserAccount).all()
-    results = []
-    for user in users:
-        role = db.query(Role).filter(Role.id == user.role_id).first()
-        results.append(UserResponse(
-            id=user.id, username=user.username, email=user.email,
-            full_name=user.full_name, role_id=user.role_id,
-            role_name=role.role_name if role else None,
-            linked_entity_type=user.linked_entity_type,
-            is_active=user.is_active, last_login_at=user.last_login_at,
-            avatar_url=user.avatar_url,
-        ))
-    return results
+    # Only the response columns: no password hashes, no ORM identity-map work
+    q = (
+        db.query(
+            UserAccount.id, UserAccount.username, UserAccount.email, UserAccount.full_name,
+            UserAccount.role_id, UserAccount.linked_entity_type, UserAccount.is_active,
+            UserAccount.last_login_at, UserAccount.avatar_url, Role.role_name,
+        )
+        .outerjoin(Role, Role.id == UserAccount.role_id)
+    )
+    if role_id is not None:
+        q = q.filter(UserAccount.role_id == role_id)
+    if cursor is not None:
+        q = q.filter(UserAccount.id > cursor)
+    # Keyset pagination; one extra row tells whether another page exists
+    rows = q.order_by(UserAccount.id).limit(limit + 1).all()
+    next_cursor = rows[limit - 1].id if len(rows) > limit else None
+    return UserPage.model_construct(
+        items=[UserResponse.from_user(row, row.role_name) for row in rows[:limit]],
+        next_cursor=next_cursor,
+    )
 
 
 @router.put("/users/{user_id}", response_model=UserResponse)
@@ -350,44 +378,44 @@ def update_user(
     db: Session = Depends(get_db),
     current_user: UserAccount = Depends(require_permissions(["admin", "users"])),
 ):
-    user = db.query(UserAccount).filter(UserAccount.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    update_data = req.model_dump(exclude_unset=True)
-    if "username" in update_data and update_data["username"] != user.username:
-        username_exists = db.query(UserAccount).filter(
-            UserAccount.username == update_data["username"],
-            UserAccount.id != user.id,
-        ).first()
-        if username_exists:
-            raise HTTPException(status_code=409, detail="Username already exists")
-    if "email" in update_data and update_data["email"] != user.email:
-        email_exists = db.query(UserAccount).filter(
-            UserAccount.email == update_data["email"],
-            UserAccount.id != user.id,
-        ).first()
-        if email_exists:
-            raise HTTPException(status_code=409, detail="Email already exists")
-    if "role_id" in update_data and update_data["role_id"] != user.role_id:
-        raise HTTPException(
-            status_code=422,
-            detail="Changing role on existing users is blocked to preserve role-linked records. Create a new user instead.",
-        )
-    for key, value in update_data.items():
-        setattr(user, key, value)
-    
+    update_data = req.model_dump(exclude_unset=True)
+    conditions = [UserAccount.id == user_id]
+    if "role_id" in update_data:
+        # Role changes are blocked; resending the current role_id is a no-op
+        conditions.append(UserAccount.role_id == update_data.pop("role_id"))
+    if update_data:
+        stmt = (
+            update(UserAccount)
+            .where(*conditions)
+            .values(**update_data)
+            .returning(UserAccount)
+            .execution_options(synchronize_session=False)
+        )
+    else:
+        stmt = select(UserAccount).where(*conditions)
+
+    try:
+        user = db.scalars(stmt).one_or_none()
+    except IntegrityError as exc:
+        db.rollback()
+        detail = conflict_detail(exc, "User update conflicts with an existing user")
+        if detail is None:
+            raise
+        raise HTTPException(status_code=409, detail=detail) from exc
+    if not user:
+        db.rollback()
+        if db.execute(select(exists().where(UserAccount.id == user_id))).scalar():
+            raise HTTPException(
+                status_code=422,
+                detail="Changing role on existing users is blocked to preserve role-linked records. Create a new user instead.",
+            )
+        raise HTTPException(status_code=404, detail="User not found")
+    role = get_cached_role(db, user.role_id)
+    # Built before commit: the RETURNING row is complete and would expire on commit
+    response = UserResponse.from_user(user, role.role_name if role else None)
     db.commit()
-    db.refresh(user)
-    role = db.query(Role).filter(Role.id == user.role_id).first()
-    return UserResponse(
-        id=user.id, username=user.username, email=user.email,
-        full_name=user.full_name, role_id=user.role_id,
-        role_name=role.role_name if role else None,
-        linked_entity_type=user.linked_entity_type,
-        is_active=user.is_active, last_login_at=user.last_login_at,
-        avatar_url=user.avatar_url,
-    )
+    forget_user(user_id)
+    return response
 
 
 @router.delete("/users/{user_id}")
@@ -396,13 +424,19 @@ def delete_user(
     db: Session = Depends(get_db),
     current_user: UserAccount = Depends(require_permissions(["admin", "users"])),
 ):
-    user = db.query(UserAccount).filter(UserAccount.id == user_id).first()
-    if not user:
+    result = db.execute(
+        delete(UserAccount)
+        .where(UserAccount.id == user_id, UserAccount.username != "admin")
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        # Only the failure path needs to tell "missing" from "protected"
+        db.rollback()
+        if db.execute(select(exists().where(UserAccount.id == user_id))).scalar():
+            raise HTTPException(status_code=400, detail="Cannot delete system admin")
         raise HTTPException(status_code=404, detail="User not found")
-    if user.username == "admin":
-        raise HTTPException(status_code=400, detail="Cannot delete system admin")
-    db.delete(user)
     db.commit()
+    forget_user(user_id)
     return {"message": "User deleted"}
 
 
@@ -38,6 +38,21 @@ class UserResponse(BaseModel):
     class Config:
         from_attributes = True
 
+    @classmethod
+    def from_user(cls, user, role_name: Optional[str] = None) -> "UserResponse":
+        """Build from a user row (ORM object or projected row) without re-validating DB values."""
+        return cls.model_construct(
+            id=user.id, username=user.username, email=user.email,
+            full_name=user.full_name, role_id=user.role_id, role_name=role_name,
+            linked_entity_type=user.linked_entity_type,
+            is_active=user.is_active, last_login_at=user.last_login_at,
+            avatar_url=user.avatar_url,
+        )
+
+class UserPage(BaseModel):
+    items: list[UserResponse]
+    next_cursor: Optional[int] = None
+
 class UserUpdate(BaseModel):
     username: Optional[str] = None
     email: Optional[EmailStr] = None
@@ -14,6 +14,38 @@ class Settings(BaseSettings):
     APP_NAME: str = "PropManager Pro"
     APP_VERSION: str = "1.0.0"
     DEBUG: bool = False
+    # Startup work. Turn off where Alembic manages the schema and the defaults
+    # are already seeded, so worker boots skip the catalog and seed queries.
+    AUTO_CREATE_SCHEMA: bool = True
+    SEED_DEFAULTS: bool = True
+    # Password for the seeded admin account; leave empty to generate a random
+    # one that is logged once when the account is created.
+    ADMIN_INITIAL_PASSWORD: str = "admin123"
+    # Cross-origin API callers, e.g. '["https://app.example.com"]'. The bundled
+    # pages are same-origin and need none; DEBUG allows any origin.
+    ALLOWED_ORIGINS: list[str] = []
+    # Optional feature modules; disabled ones are neither imported nor routed
+    ENABLE_CRM: bool = True
+    ENABLE_MARKETING: bool = True
+    # Background sweep of compliance uploads no document references (deleted
+    # documents, failed or abandoned uploads); files younger than the age
+    # limit are kept so in-flight uploads are never touched.
+    UPLOAD_SWEEP_INTERVAL_MINUTES: int = 60
+    UPLOAD_ORPHAN_MAX_AGE_HOURS: int = 24
+
+    # Connection pool (ignored for SQLite). pool_size + max_overflow should
+    # cover the worker threadpool (THREADPOOL_SIZE) so requests never
+    # queue waiting for a connection.
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 40
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 3600
+    # Threads for sync (def) endpoints; anyio's default is 40. Keep it no larger
+    # than pool_size + max_overflow so every thread can get a connection.
+    THREADPOOL_SIZE: int = 60
+
+    # PBKDF2-SHA256 work factor; stored hashes below it are upgraded on login
+    PASSWORD_HASH_ROUNDS: int = 29000
 
     # SMTP Settings
     SMTP_SERVER: str = "smtp.gmail.com"
@@ -1,18 +1,26 @@
 """Dashboard mart models."""
-from sqlalchemy import Column, Integer, String, Date, DateTime, Numeric, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Date, DateTime, Numeric, ForeignKey, JSON, Index
 from sqlalchemy.sql import func
 from app.database import Base
 
 
 class KPIDailyFact(Base):
     __tablename__ = "kpi_daily_facts"
+    __table_args__ = (
+        # list_daily_kpis: org + metric over a date range
+        Index("ix_kpi_daily_facts_org_metric_date", "tenant_org_id", "metric_code", "fact_date"),
+        # list_daily_kpis without a metric, and rebuild_daily_kpis' delete
+        Index("ix_kpi_daily_facts_org_date_scope", "tenant_org_id", "fact_date", "scope_type"),
+    )
     id = Column(Integer, primary_key=True, autoincrement=True)
     tenant_org_id = Column(Integer, ForeignKey("tenant_orgs.id"), nullable=False)
+    # Org-less (admin) listing of list_daily_kpis orders by date alone
     fact_date = Column(Date, nullable=False, index=True)
     scope_type = Column(String(30), default="Tenant")  # Tenant/Region/Property
     scope_id = Column(Integer)
     metric_code = Column(String(100), nullable=False, index=True)
-    metric_value = Column(Numeric(18, 4), nullable=False, default=0)
+    # Stored exactly, read back as float: the mart is only aggregated and served as JSON
+    metric_value = Column(Numeric(18, 4, asdecimal=False), nullable=False, default=0)
     currency = Column(String(10))
     dimensions = Column(JSON)
     created_at = Column(DateTime, server_default=func.now())
@@ -16,10 +16,11 @@ if "sqlite" in settings.DATABASE_URL:
 else:
     engine = create_engine(
         settings.DATABASE_URL,
-        pool_size=20,
-        max_overflow=10,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
         pool_pre_ping=True,
-        pool_recycle=3600,
+        pool_recycle=settings.DB_POOL_RECYCLE,
         echo=settings.DEBUG,
     )
 
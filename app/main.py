@@ -1,38 +1,27 @@
 """FastAPI application entry point."""
+import importlib
 import os
 import logging
-from contextlib import asynccontextmanager
-from fastapi import FastAPI, Request, Depends
+import secrets
+from types import SimpleNamespace
+from contextlib import asynccontextmanager, contextmanager
+import anyio.to_thread
+import jinja2
+from fastapi import FastAPI, Request, Depends, status
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
+from fastapi.responses import HTMLResponse, ORJSONResponse, Response
+from sqlalchemy import insert, text
 from app.config import get_settings
-from app.database import get_db, init_db, Base, engine
-from app.auth.dependencies import get_current_user_from_token
+from app.database import get_db, init_db, Base, engine, SessionLocal
+from app.auth.dependencies import get_current_user_from_token, hash_password, prime_role_cache
 from app.auth.models import UserAccount, Role
 from app.modules.properties.models import TenantOrg
 from app.modules.system.models import OrgSettings, Country, Currency
-from app.auth.routes import router as auth_router
-from app.modules.properties.routes import router as properties_router, tenants_router, staff_router, owners_router, vendors_router
-from app.modules.properties.asset_routes import router as assets_router
-from app.modules.system.routes import router as system_router
-from app.modules.leasing.routes import router as leasing_router
-from app.modules.billing.routes import router as billing_router
-from app.modules.maintenance.routes import router as maintenance_router
 from app.utils.scheduler_service import scheduler
-from app.dashboards.routes import router as dashboard_router
-from app.modules.accounting.routes import router as accounting_router
-from app.modules.crm.routes import router as crm_router
-from app.modules.marketing.routes import router as marketing_router
-from app.modules.compliance.routes import router as compliance_router
-from app.modules.workflow.routes import router as workflow_router
-from app.utils.export_service import router as export_router
-from app.utils.automation_routes import router as automation_router
-from app.modules.utilities.routes import router as utilities_router
-from app.modules.portal.routes import router as portal_router
+from app.utils.upload_cleanup_service import sweep_orphan_uploads
 from app.middleware.audit import AuditMiddleware
+from app.middleware.cors import ApiCORSMiddleware
 
 # Import all models so that Base.metadata knows about them
 from app.modules.properties import models as _pm
@@ -42,23 +31,46 @@ from app.modules.accounting import models as _am
 from app.modules.maintenance import models as _mm
 from app.modules.crm import models as _cm
 from app.modules.marketing import models as _mkm
-from app.modules.compliance import models as _cpm
-from app.modules.workflow import models as _wm
-from app.modules.utilities import models as _um
-from app.modules.system import models as _sm
-from app.dashboards import models as _dm
+from app.modules.compliance import models as _cpm
+from app.modules.workflow import models as _wm
+from app.modules.utilities import models as _um
+from app.modules.system import models as _sm
+from app.dashboards import models as _dm
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
-
-
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    """Single lifespan context manager — replaces duplicate @app.on_event handlers."""
-    # --- Startup ---
-    Base.metadata.create_all(bind=engine)
-
-    # Seed/update default roles idempotently.
+# Plain-attribute snapshot for Jinja contexts; settings are fixed per process
+TEMPLATE_SETTINGS = SimpleNamespace(**settings.model_dump())
+
+# Arbitrary app-wide key for the seeding advisory lock ("PROP")
+_SEED_LOCK_KEY = 0x50524F50
+
+
+@contextmanager
+def _seed_lock():
+    """Yield True when this worker should run the seed.
+
+    On PostgreSQL only the worker that wins ``pg_try_advisory_lock`` seeds;
+    the others skip straight past. Other backends (SQLite) are single-host
+    dev setups and the seed is idempotent, so they always proceed.
+    """
+    if engine.dialect.name != "postgresql":
+        yield True
+        return
+    # Session-level lock: hold it on one dedicated connection until done
+    with engine.connect() as conn:
+        acquired = conn.execute(
+            text("SELECT pg_try_advisory_lock(:k)"), {"k": _SEED_LOCK_KEY}
+        ).scalar()
+        try:
+            yield bool(acquired)
+        finally:
+            if acquired:
+                conn.execute(text("SELECT pg_advisory_unlock(:k)"), {"k": _SEED_LOCK_KEY})
+
+
+def _seed_defaults() -> None:
+    """Idempotently seed roles, geo data, the default org and the admin user."""
     db = next(get_db())
     try:
         role_defaults = [
@@ -95,19 +107,27 @@ async def lifespan(app: FastAPI):
             (6, "accountant", "Finance portal", {"billing": True, "accounting": True, "reports": True, "export": True}),
             (7, "support", "Support admin", {"users": True, "system": True, "reports": True}),
         ]
+        # One SELECT for all default roles, one bulk INSERT for the missing ones
+        existing_roles = {
+            r.id: r for r in db.query(Role).filter(Role.id.in_([d[0] for d in role_defaults])).all()
+        }
+        missing_roles = [
+            {
+                "id": role_id,
+                "role_name": role_name,
+                "description": description,
+                "permissions": default_perms,
+                "is_system": True,
+                "is_active": True,
+            }
+            for role_id, role_name, description, default_perms in role_defaults
+            if role_id not in existing_roles
+        ]
+        if missing_roles:
+            db.execute(insert(Role), missing_roles)
         for role_id, role_name, description, default_perms in role_defaults:
-            role = db.query(Role).filter(Role.id == role_id).first()
-            if not role:
-                db.add(
-                    Role(
-                        id=role_id,
-                        role_name=role_name,
-                        description=description,
-                        permissions=default_perms,
-                        is_system=True,
-                        is_active=True,
-                    )
-                )
+            role = existing_roles.get(role_id)
+            if role is None:
                 continue
             current_perms = role.permissions if isinstance(role.permissions, dict) else {}
             merged_perms = {**default_perms, **current_perms}
@@ -120,19 +140,20 @@ async def lifespan(app: FastAPI):
         db.commit()
 
         # Seed minimal geo data if missing
-        if db.query(Country).count() == 0:
-            db.add_all([
-                Country(country_code="US", country_name="United States", iso3="USA",
-                        default_currency_code="USD", default_timezone="America/New_York", phone_code="+1"),
-                Country(country_code="GB", country_name="United Kingdom", iso3="GBR",
-                        default_currency_code="GBP", default_timezone="Europe/London", phone_code="+44"),
+        # Emptiness probes: first row only, never a COUNT(*)
+        if db.query(Country.id).first() is None:
+            db.execute(insert(Country), [
+                {"country_code": "US", "country_name": "United States", "iso3": "USA",
+                 "default_currency_code": "USD", "default_timezone": "America/New_York", "phone_code": "+1"},
+                {"country_code": "GB", "country_name": "United Kingdom", "iso3": "GBR",
+                 "default_currency_code": "GBP", "default_timezone": "Europe/London", "phone_code": "+44"},
             ])
             db.commit()
 
-        if db.query(Currency).count() == 0:
-            db.add_all([
-                Currency(currency_code="USD", currency_name="US Dollar", symbol="$", minor_units=2),
-                Currency(currency_code="GBP", currency_name="British Pound", symbol="£", minor_units=2),
+        if db.query(Currency.id).first() is None:
+            db.execute(insert(Currency), [
+                {"currency_code": "USD", "currency_name": "US Dollar", "symbol": "$", "minor_units": 2},
+                {"currency_code": "GBP", "currency_name": "British Pound", "symbol": "£", "minor_units": 2},
             ])
             db.commit()
 
@@ -144,7 +165,7 @@ async def lifespan(app: FastAPI):
             db.commit()
             db.refresh(org)
 
-        if db.query(OrgSettings).filter(OrgSettings.tenant_org_id == org.id).count() == 0:
+        if db.query(OrgSettings.id).filter(OrgSettings.tenant_org_id == org.id).first() is None:
             db.add(OrgSettings(
                 tenant_org_id=org.id,
                 base_currency="USD",
@@ -156,26 +177,48 @@ async def lifespan(app: FastAPI):
             ))
             db.commit()
 
-        # Create default admin user
-        from app.auth.dependencies import hash_password
-        if db.query(UserAccount).filter(UserAccount.username == "admin").count() == 0:
+        # Create default admin user; the only password hash the seed computes
+        admin = db.query(UserAccount).filter(UserAccount.username == "admin").first()
+        if admin is None:
+            admin_password = settings.ADMIN_INITIAL_PASSWORD
+            if not admin_password:
+                admin_password = secrets.token_urlsafe(12)
+                logger.warning("Created admin user with generated password: %s", admin_password)
             admin = UserAccount(
                 username="admin", email="admin@propmanager.com",
-                password_hash=hash_password("admin123"),
+                password_hash=hash_password(admin_password),
                 full_name="System Administrator", role_id=1, is_active=True,
                 tenant_org_id=org.id,
             )
             db.add(admin)
             db.commit()
-        else:
-            admin = db.query(UserAccount).filter(UserAccount.username == "admin").first()
-            if admin and not admin.tenant_org_id:
-                admin.tenant_org_id = org.id
-                db.commit()
+        elif not admin.tenant_org_id:
+            admin.tenant_org_id = org.id
+            db.commit()
     finally:
         db.close()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Single lifespan context manager — replaces duplicate @app.on_event handlers."""
+    # --- Startup ---
+    if settings.AUTO_CREATE_SCHEMA:
+        Base.metadata.create_all(bind=engine)
+    if settings.SEED_DEFAULTS:
+        with _seed_lock() as acquired:
+            if acquired:
+                _seed_defaults()
+
+    # Sync endpoints hold a worker thread for every DB call; size the pool to the connection pool
+    anyio.to_thread.current_default_thread_limiter().total_tokens = settings.THREADPOOL_SIZE
+
+    # Roles are static after seeding; warm the in-process cache
+    with SessionLocal() as db:
+        prime_role_cache(db)
 
     scheduler.start()
+    scheduler.add_interval_job(sweep_orphan_uploads, "upload_orphan_sweep", settings.UPLOAD_SWEEP_INTERVAL_MINUTES)
     logger.info("Application startup complete.")
 
     yield
@@ -185,7 +228,8 @@ async def lifespan(app: FastAPI):
     logger.info("Application shutdown complete.")
 
 
-app = FastAPI(title=settings.APP_NAME, version=settings.APP_VERSION, lifespan=lifespan)
+app = FastAPI(title=settings.APP_NAME, version=settings.APP_VERSION, lifespan=lifespan,
+              default_response_class=ORJSONResponse)
 
 # Create directories
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -195,376 +239,152 @@ UPLOAD_DIR = settings.UPLOAD_DIR
 if not os.path.isabs(UPLOAD_DIR):
     UPLOAD_DIR = os.path.join(BASE_DIR, "..", UPLOAD_DIR)
 UPLOAD_DIR = os.path.abspath(UPLOAD_DIR)
-os.makedirs(STATIC_DIR, exist_ok=True)
-os.makedirs(os.path.join(STATIC_DIR, "css"), exist_ok=True)
-os.makedirs(os.path.join(STATIC_DIR, "js"), exist_ok=True)
-os.makedirs(os.path.join(STATIC_DIR, "img"), exist_ok=True)
-os.makedirs(os.path.join(STATIC_DIR, "qrcodes"), exist_ok=True)
+# Leaf directories only; makedirs creates STATIC_DIR along the way
+for _dir in ("css", "js", "img", "qrcodes"):
+    os.makedirs(os.path.join(STATIC_DIR, _dir), exist_ok=True)
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
 app.mount("/uploads", StaticFiles(directory=UPLOAD_DIR), name="uploads")
-templates = Jinja2Templates(directory=TEMPLATE_DIR)
+# Compiled templates persist in Jinja's per-user temp cache across restarts;
+# outside DEBUG the per-render mtime check is skipped too
+templates = Jinja2Templates(env=jinja2.Environment(
+    loader=jinja2.FileSystemLoader(TEMPLATE_DIR),
+    autoescape=True,
+    bytecode_cache=jinja2.FileSystemBytecodeCache(),
+    auto_reload=settings.DEBUG,
+    cache_size=400,
+))
 
 # Register Middleware
 app.add_middleware(AuditMiddleware)
 app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
+    ApiCORSMiddleware,
+    allow_origins=["*"] if settings.DEBUG else settings.ALLOWED_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
 )
 
-# Register ALL API routers (before any route definitions)
-app.include_router(auth_router)
-app.include_router(properties_router)
-app.include_router(system_router)
-app.include_router(tenants_router)
-app.include_router(staff_router)
-app.include_router(owners_router)
-app.include_router(vendors_router)
-app.include_router(leasing_router)
-app.include_router(billing_router)
-app.include_router(maintenance_router)
-app.include_router(dashboard_router)
-app.include_router(accounting_router)
-app.include_router(crm_router)
-app.include_router(marketing_router)
-app.include_router(compliance_router)
-app.include_router(workflow_router)
-app.include_router(export_router)
-app.include_router(automation_router)
-app.include_router(assets_router)
-app.include_router(utilities_router)
-app.include_router(portal_router)
+# API routers: (module, router attribute, enabled). Registered in this order,
+# before any route definitions; disabled modules are never imported.
+ROUTERS = [
+    ("app.auth.routes", "router", True),
+    ("app.modules.properties.routes", "router", True),
+    ("app.modules.system.routes", "router", True),
+    ("app.modules.properties.routes", "tenants_router", True),
+    ("app.modules.properties.routes", "staff_router", True),
+    ("app.modules.properties.routes", "owners_router", True),
+    ("app.modules.properties.routes", "vendors_router", True),
+    ("app.modules.leasing.routes", "router", True),
+    ("app.modules.billing.routes", "router", True),
+    ("app.modules.maintenance.routes", "router", True),
+    ("app.dashboards.routes", "router", True),
+    ("app.modules.accounting.routes", "router", True),
+    ("app.modules.crm.routes", "router", settings.ENABLE_CRM),
+    ("app.modules.marketing.routes", "router", settings.ENABLE_MARKETING),
+    ("app.modules.compliance.routes", "router", True),
+    ("app.modules.workflow.routes", "router", True),
+    ("app.utils.export_service", "router", True),
+    ("app.utils.automation_routes", "router", True),
+    ("app.modules.properties.asset_routes", "router", True),
+    ("app.modules.utilities.routes", "router", True),
+    ("app.modules.portal.routes", "router", True),
+]
+
+for _module, _attr, _enabled in ROUTERS:
+    if _enabled:
+        app.include_router(getattr(importlib.import_module(_module), _attr))
 
 
 # --- Health Check ---
+_HEALTH_BODY = {"status": "healthy", "version": settings.APP_VERSION}
+
+
 @app.get("/api/health")
 def health_check():
-    return {"status": "healthy", "version": settings.APP_VERSION}
+    return ORJSONResponse(_HEALTH_BODY)
 
 
 # --- Page Routes ---
+def _redirect(location: str) -> Response:
+    """Bare 302 for page redirects.
+
+    Built per request rather than shared: middleware may edit a response's
+    raw header list in place while sending it.
+    """
+    return Response(status_code=status.HTTP_302_FOUND, headers={"location": location})
+
+
 @app.get("/", response_class=HTMLResponse)
 async def root(request: Request):
-    return RedirectResponse(url="/login")
+    return _redirect("/login")
 
 
 @app.get("/login", response_class=HTMLResponse)
 async def login_page(request: Request):
-    return templates.TemplateResponse("auth/login.html", {"request": request, "settings": settings})
+    return templates.TemplateResponse("auth/login.html", {"request": request, "settings": TEMPLATE_SETTINGS})
 
 
 @app.get("/register", response_class=HTMLResponse)
 async def register_page(request: Request):
-    return templates.TemplateResponse("auth/register.html", {"request": request, "settings": settings})
-
-
-@app.get("/dashboard", response_class=HTMLResponse)
-async def dashboard_page(request: Request, user: UserAccount = Depends(get_current_user_from_token),
-                          db: Session = Depends(get_db)):
-    if not user:
-        return RedirectResponse(url="/login")
-    role = db.query(Role).filter(Role.id == user.role_id).first()
-    return templates.TemplateResponse("dashboard/index.html", {
-        "request": request, "user": user, "role": role, "settings": settings
-    })
-
-
-@app.get("/portal/tenant", response_class=HTMLResponse)
-async def tenant_portal_page(request: Request, user: UserAccount = Depends(get_current_user_from_token),
-                              db: Session = Depends(get_db)):
-    if not user:
-        return RedirectResponse(url="/login")
-    role = db.query(Role).filter(Role.id == user.role_id).first()
-    return templates.TemplateResponse("portal/tenant.html", {
-        "request": request, "user": user, "role": role, "settings": settings
-    })
-
-
-@app.get("/portal/owner", response_class=HTMLResponse)
-async def owner_portal_page(request: Request, user: UserAccount = Depends(get_current_user_from_token),
-                             db: Session = Depends(get_db)):
-    if not user:
-        return RedirectResponse(url="/login")
-    role = db.query(Role).filter(Role.id == user.role_id).first()
-    return templates.TemplateResponse("portal/owner.html", {
-        "request": request, "user": user, "role": role, "settings": settings
-    })
-
-
-@app.get("/portal/vendor", response_class=HTMLResponse)
-async def vendor_portal_page(request: Request, user: UserAccount = Depends(get_current_user_from_token),
-                              db: Session = Depends(get_db)):
-    if not user:
-        return RedirectResponse(url="/login")
-    role = db.query(Role).filter(Role.id == user.role_id).first()
-    return templates.TemplateResponse("portal/vendor.html", {
-        "request": request, "user": user, "role": role, "settings": settings
-    })
-
-
-@app.get("/properties", response_class=HTMLResponse)
-async def properties_page(request: Request, user: UserAccount = Depends(get_current_user_from_token),
-                           db: Session = Depends(get_db)):
-    if not user:
-        return RedirectResponse(url="/login")
-    role = db.query(Role).filter(Role.id == user.role_id).first()
-    return templates.TemplateResponse("properties/index.html", {
-        "request": request, "user": user, "role": role, "settings": settings
-    })
-
-
-@app.get("/properties/{prop_id}", response_class=HTMLResponse)
-async def property_detail_page(request: Request, prop_id: int,
-                                user: UserAccount = Depends(get_current_user_from_token),
-                                db: Session = Depends(get_db)):
-    if not user:
-        return RedirectResponse(url="/login")
-    role = db.query(Role).filter(Role.id == user.role_id).first()
-    return templates.TemplateResponse("properties/detail.html", {
-        "request": request, "user": user, "role": role, "prop_id": prop_id, "settings": settings
-    })
-
-
-@app.get("/properties/{prop_id}/units/{unit_id}", response_class=HTMLResponse)
-async def unit_detail_page(request: Request, prop_id: int, unit_id: int,
-                            user: UserAccount = Depends(get_current_user_from_token),
-                            db: Session = Depends(get_db)):
-    if not user:
-        return RedirectResponse(url="/login")
-    role = db.query(Role).filter(Role.id == user.role_id).first()
-    return templates.TemplateResponse("properties/unit_detail.html", {
-        "request": request, "user": user, "role": role, "prop_id": prop_id, "unit_id": unit_id, "settings": settings
-    })
-
-
-@app.get("/assets", response_class=HTMLResponse)
-async def assets_page(request: Request, user: UserAccount = Depends(get_current_user_from_token),
-                       db: Session = Depends(get_db)):
-    if not user:
-        return RedirectResponse(url="/login")
-    role = db.query(Role).filter(Role.id == user.role_id).first()
-    return templates.TemplateResponse("properties/assets.html", {
-        "request": request, "user": user, "role": role, "settings": settings
-    })
-
-
-@app.get("/utilities", response_class=HTMLResponse)
-async def utilities_page(request: Request, user: UserAccount = Depends(get_current_user_from_token),
-                          db: Session = Depends(get_db)):
-    if not user:
-        return RedirectResponse(url="/login")
-    role = db.query(Role).filter(Role.id == user.role_id).first()
-    return templates.TemplateResponse("utilities/index.html", {
-        "request": request, "user": user, "role": role, "settings": settings
-    })
-
-
-@app.get("/leases", response_class=HTMLResponse)
-async def leases_page(request: Request, user: UserAccount = Depends(get_current_user_from_token),
-                       db: Session = Depends(get_db)):
-    if not user:
-        return RedirectResponse(url="/login")
-    role = db.query(Role).filter(Role.id == user.role_id).first()
-    return templates.TemplateResponse("leasing/index.html", {
-        "request": request, "user": user, "role": role, "settings": settings
-    })
-
-
-@app.get("/invoices", response_class=HTMLResponse)
-async def invoices_page(request: Request, user: UserAccount = Depends(get_current_user_from_token),
-                         db: Session = Depends(get_db)):
-    if not user:
-        return RedirectResponse(url="/login")
-    role = db.query(Role).filter(Role.id == user.role_id).first()
-    return templates.TemplateResponse("billing/index.html", {
-        "request": request, "user": user, "role": role, "settings": settings
-    })
-
-
-@app.get("/maintenance", response_class=HTMLResponse)
-async def maintenance_page(request: Request, user: UserAccount = Depends(get_current_user_from_token),
-                            db: Session = Depends(get_db)):
-    if not user:
-        return RedirectResponse(url="/login")
-    role = db.query(Role).filter(Role.id == user.role_id).first()
-    return templates.TemplateResponse("maintenance/index.html", {
-        "request": request, "user": user, "role": role, "settings": settings
-    })
-
-
-@app.get("/tenants", response_class=HTMLResponse)
-async def tenants_page(request: Request, user: UserAccount = Depends(get_current_user_from_token),
-                        db: Session = Depends(get_db)):
-    if not user:
-        return RedirectResponse(url="/login")
-    role = db.query(Role).filter(Role.id == user.role_id).first()
-    return templates.TemplateResponse("tenants/index.html", {
-        "request": request, "user": user, "role": role, "settings": settings
-    })
-
-
-@app.get("/owners", response_class=HTMLResponse)
-async def owners_page(request: Request, user: UserAccount = Depends(get_current_user_from_token),
-                      db: Session = Depends(get_db)):
-    if not user:
-        return RedirectResponse(url="/login")
-    role = db.query(Role).filter(Role.id == user.role_id).first()
-    return templates.TemplateResponse("tenants/owners.html", {
-        "request": request, "user": user, "role": role, "settings": settings
-    })
-
-
-@app.get("/staff", response_class=HTMLResponse)
-async def staff_page(request: Request, user: UserAccount = Depends(get_current_user_from_token),
-                     db: Session = Depends(get_db)):
-    if not user:
-        return RedirectResponse(url="/login")
-    role = db.query(Role).filter(Role.id == user.role_id).first()
-    if role.id != 1:  # Admin only
-        return RedirectResponse(url="/dashboard")
-    return templates.TemplateResponse("auth/staff.html", {
-        "request": request, "user": user, "role": role, "settings": settings, "active_page": "staff"
-    })
-
-
-@app.get("/reports", response_class=HTMLResponse)
-async def reports_page(request: Request, user: UserAccount = Depends(get_current_user_from_token),
-                        db: Session = Depends(get_db)):
-    if not user:
-        return RedirectResponse(url="/login")
-    role = db.query(Role).filter(Role.id == user.role_id).first()
-    return templates.TemplateResponse("reports/index.html", {
-        "request": request, "user": user, "role": role, "settings": settings
-    })
-
-
-@app.get("/accounting", response_class=HTMLResponse)
-async def accounting_page(request: Request, user: UserAccount = Depends(get_current_user_from_token),
-                           db: Session = Depends(get_db)):
-    if not user:
-        return RedirectResponse(url="/login")
-    role = db.query(Role).filter(Role.id == user.role_id).first()
-    return templates.TemplateResponse("accounting/index.html", {
-        "request": request, "user": user, "role": role, "settings": settings
-    })
-
-
-@app.get("/crm", response_class=HTMLResponse)
-async def crm_page(request: Request, user: UserAccount = Depends(get_current_user_from_token),
-                    db: Session = Depends(get_db)):
-    if not user:
-        return RedirectResponse(url="/login")
-    role = db.query(Role).filter(Role.id == user.role_id).first()
-    return templates.TemplateResponse("crm/index.html", {
-        "request": request, "user": user, "role": role, "settings": settings
-    })
-
-
-@app.get("/marketing", response_class=HTMLResponse)
-async def marketing_page(request: Request, user: UserAccount = Depends(get_current_user_from_token),
-                          db: Session = Depends(get_db)):
-    if not user:
-        return RedirectResponse(url="/login")
-    role = db.query(Role).filter(Role.id == user.role_id).first()
-    return templates.TemplateResponse("marketing/index.html", {
-        "request": request, "user": user, "role": role, "settings": settings
-    })
-
-
-@app.get("/compliance", response_class=HTMLResponse)
-async def compliance_page(request: Request, user: UserAccount = Depends(get_current_user_from_token),
-                           db: Session = Depends(get_db)):
-    if not user:
-        return RedirectResponse(url="/login")
-    role = db.query(Role).filter(Role.id == user.role_id).first()
-    return templates.TemplateResponse("compliance/index.html", {
-        "request": request, "user": user, "role": role, "settings": settings
-    })
-
-
-@app.get("/workflow", response_class=HTMLResponse)
-async def workflow_page(request: Request, user: UserAccount = Depends(get_current_user_from_token),
-                         db: Session = Depends(get_db)):
-    if not user:
-        return RedirectResponse(url="/login")
-    role = db.query(Role).filter(Role.id == user.role_id).first()
-    return templates.TemplateResponse("workflow/index.html", {
-        "request": request, "user": user, "role": role, "settings": settings
-    })
+    return templates.TemplateResponse("auth/register.html", {"request": request, "settings": TEMPLATE_SETTINGS})
 
 
 @app.get("/workplace", response_class=HTMLResponse)
 @app.get("/workplace-management", response_class=HTMLResponse)
 async def workplace_page(request: Request, user: UserAccount = Depends(get_current_user_from_token)):
     if not user:
-        return RedirectResponse(url="/login")
-    return RedirectResponse(url="/workflow")
-
-
-@app.get("/users", response_class=HTMLResponse)
-async def users_page(request: Request, user: UserAccount = Depends(get_current_user_from_token),
-                     db: Session = Depends(get_db)):
-    if not user:
-        return RedirectResponse(url="/login")
-    role = db.query(Role).filter(Role.id == user.role_id).first()
-    if role.id != 1:  # Only allow admin
-        return RedirectResponse(url="/dashboard")
-    return templates.TemplateResponse("auth/users.html", {
-        "request": request, "user": user, "role": role, "settings": settings, "active_page": "users"
-    })
-
-
-@app.get("/roles", response_class=HTMLResponse)
-async def roles_page(request: Request, user: UserAccount = Depends(get_current_user_from_token),
-                     db: Session = Depends(get_db)):
-    if not user:
-        return RedirectResponse(url="/login")
-    role = db.query(Role).filter(Role.id == user.role_id).first()
-    if role.id != 1:  # Only allow admin
-        return RedirectResponse(url="/dashboard")
-    return templates.TemplateResponse("auth/roles.html", {
-        "request": request, "user": user, "role": role, "settings": settings, "active_page": "roles"
-    })
-
-
-@app.get("/settings", response_class=HTMLResponse)
-async def settings_page(request: Request, user: UserAccount = Depends(get_current_user_from_token),
-                         db: Session = Depends(get_db)):
-    if not user:
-        return RedirectResponse(url="/login")
-    role = db.query(Role).filter(Role.id == user.role_id).first()
-    if role.id != 1:  # Only allow admin
-        return RedirectResponse(url="/dashboard")
-    return templates.TemplateResponse("system/settings.html", {
-        "request": request, "user": user, "role": role, "settings": settings, "active_page": "settings"
-    })
+        return _redirect("/login")
+    return _redirect("/workflow")
 
 
-@app.get("/qa/ui-regression", response_class=HTMLResponse)
-async def ui_regression_page(request: Request, user: UserAccount = Depends(get_current_user_from_token),
-                             db: Session = Depends(get_db)):
-    if not user:
-        return RedirectResponse(url="/login")
-    role = db.query(Role).filter(Role.id == user.role_id).first()
-    if role.id != 1:
-        return RedirectResponse(url="/dashboard")
-    return templates.TemplateResponse("system/ui_regression.html", {
-        "request": request, "user": user, "role": role, "settings": settings, "active_page": "ui-qa"
-    })
+# Authenticated template pages: (path, template, route name, admin only, active_page)
+PAGES = [
+    ("/dashboard", "dashboard/index.html", "dashboard_page", False, None),
+    ("/portal/tenant", "portal/tenant.html", "tenant_portal_page", False, None),
+    ("/portal/owner", "portal/owner.html", "owner_portal_page", False, None),
+    ("/portal/vendor", "portal/vendor.html", "vendor_portal_page", False, None),
+    ("/properties", "properties/index.html", "properties_page", False, None),
+    ("/properties/{prop_id:int}", "properties/detail.html", "property_detail_page", False, None),
+    ("/properties/{prop_id:int}/units/{unit_id:int}", "properties/unit_detail.html", "unit_detail_page", False, None),
+    ("/assets", "properties/assets.html", "assets_page", False, None),
+    ("/utilities", "utilities/index.html", "utilities_page", False, None),
+    ("/leases", "leasing/index.html", "leases_page", False, None),
+    ("/invoices", "billing/index.html", "invoices_page", False, None),
+    ("/maintenance", "maintenance/index.html", "maintenance_page", False, None),
+    ("/tenants", "tenants/index.html", "tenants_page", False, None),
+    ("/owners", "tenants/owners.html", "owners_page", False, None),
+    ("/staff", "auth/staff.html", "staff_page", True, "staff"),
+    ("/reports", "reports/index.html", "reports_page", False, None),
+    ("/accounting", "accounting/index.html", "accounting_page", False, None),
+    ("/crm", "crm/index.html", "crm_page", False, None),
+    ("/marketing", "marketing/index.html", "marketing_page", False, None),
+    ("/compliance", "compliance/index.html", "compliance_page", False, None),
+    ("/workflow", "workflow/index.html", "workflow_page", False, None),
+    ("/users", "auth/users.html", "users_page", True, "users"),
+    ("/roles", "auth/roles.html", "roles_page", True, "roles"),
+    ("/settings", "system/settings.html", "settings_page", True, "settings"),
+    ("/qa/ui-regression", "system/ui_regression.html", "ui_regression_page", True, "ui-qa"),
+    ("/workflow/scheduler", "workflow/scheduler.html", "scheduler_page", True, "scheduler"),
+]
+
+
+def _make_page(template: str, admin_only: bool, active_page: str | None):
+    async def page(request: Request, user: UserAccount = Depends(get_current_user_from_token)):
+        if not user:
+            return _redirect("/login")
+        role = user.role
+        if admin_only and role.id != 1:
+            return _redirect("/dashboard")
+        # Path params (prop_id, unit_id) are already ints via the route convertors
+        context = {"request": request, "user": user, "role": role, "settings": TEMPLATE_SETTINGS, **request.path_params}
+        if active_page:
+            context["active_page"] = active_page
+        return templates.TemplateResponse(template, context)
+    return page
 
 
-@app.get("/workflow/scheduler", response_class=HTMLResponse)
-async def scheduler_page(request: Request, user: UserAccount = Depends(get_current_user_from_token),
-                         db: Session = Depends(get_db)):
-    if not user:
-        return RedirectResponse(url="/login")
-    role = db.query(Role).filter(Role.id == user.role_id).first()
-    if role.id != 1:  # Only allow admin
-        return RedirectResponse(url="/dashboard")
-    return templates.TemplateResponse("workflow/scheduler.html", {
-        "request": request, "user": user, "role": role, "settings": settings, "active_page": "scheduler"
-    })
+for _path, _template, _name, _admin_only, _active_page in PAGES:
+    app.add_api_route(_path, _make_page(_template, _admin_only, _active_page),
+                      methods=["GET"], response_class=HTMLResponse, name=_name)
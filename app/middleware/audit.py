@@ -6,13 +6,20 @@ from sqlalchemy.orm import Session
 from app.database import SessionLocal
 from app.auth.models import AuditLog
 from app.config import get_settings
-from jose import jwt, JWTError
+from app.auth.dependencies import decode_access_token
+from jose import JWTError
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# Mounted file servers: never audited, so skip the middleware work entirely
+_SKIP_PREFIXES = ("/static/", "/uploads/")
+
 class AuditMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next):
+        if request.url.path.startswith(_SKIP_PREFIXES):
+            return await call_next(request)
+
         response = await call_next(request)
 
         # Log only state-changing methods + successful responses
@@ -24,7 +31,7 @@ class AuditMiddleware(BaseHTTPMiddleware):
                 if auth_header and auth_header.startswith("Bearer "):
                     token = auth_header.split(" ")[1]
                     try:
-                        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+                        payload = decode_access_token(token)
                         user_id = payload.get("sub")
                         if user_id:
                             user_id = int(user_id)
@@ -36,7 +43,7 @@ class AuditMiddleware(BaseHTTPMiddleware):
                      token = request.cookies.get("access_token")
                      if token:
                          try:
-                            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+                            payload = decode_access_token(token)
                             user_id = payload.get("sub")
                             if user_id:
                                 user_id = int(user_id)
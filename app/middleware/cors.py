@@ -0,0 +1,22 @@
+"""CORS applied to API paths only."""
+from starlette.middleware.cors import CORSMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class ApiCORSMiddleware:
+    """Run CORSMiddleware for /api/* requests; HTML pages and static files skip it.
+
+    Pages and assets are always loaded same-origin, so CORS headers on them
+    are dead weight.
+    """
+
+    def __init__(self, app: ASGIApp, prefix: str = "/api/", **cors_options) -> None:
+        self.app = app
+        self.prefix = prefix
+        self.cors = CORSMiddleware(app, **cors_options)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["path"].startswith(self.prefix):
+            await self.cors(scope, receive, send)
+        else:
+            await self.app(scope, receive, send)
@@ -1,5 +1,6 @@
 """Billing models – Invoice, Payment, FX, LateFee."""
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Date, Text, Numeric, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Date, Text, Numeric, ForeignKey, JSON, Index
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
 
@@ -27,6 +28,10 @@ class PaymentMethod(Base):
 
 class ExchangeRateDaily(Base):
     __tablename__ = "exchange_rates_daily"
+    __table_args__ = (
+        # _latest_rate: newest rate for a pair on or before a date (scanned backwards)
+        Index("ix_exchange_rates_daily_pair_date", "from_currency", "to_currency", "rate_date", "id"),
+    )
     id = Column(Integer, primary_key=True, autoincrement=True)
     rate_date = Column(Date, nullable=False)
     from_currency = Column(String(10), nullable=False)
@@ -40,6 +45,10 @@ class ExchangeRateDaily(Base):
 
 class Invoice(Base):
     __tablename__ = "invoices"
+    __table_args__ = (
+        # list_invoices: org's invoices newest first
+        Index("ix_invoices_org_id", "tenant_org_id", "id"),
+    )
     id = Column(Integer, primary_key=True, autoincrement=True)
     tenant_org_id = Column(Integer, ForeignKey("tenant_orgs.id"))
     invoice_number = Column(String(50), nullable=False, unique=True, index=True)
@@ -68,6 +77,8 @@ class Invoice(Base):
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
 
+    lines = relationship("InvoiceLine", lazy="raise")
+
 
 class InvoiceLine(Base):
     __tablename__ = "invoice_lines"
@@ -87,6 +98,10 @@ class InvoiceLine(Base):
 
 class Payment(Base):
     __tablename__ = "payments"
+    __table_args__ = (
+        # list_payments: org's payments newest first
+        Index("ix_payments_org_id", "tenant_org_id", "id"),
+    )
     id = Column(Integer, primary_key=True, autoincrement=True)
     tenant_org_id = Column(Integer, ForeignKey("tenant_orgs.id"))
     payment_number = Column(String(50), nullable=False, unique=True, index=True)
@@ -103,6 +118,8 @@ class Payment(Base):
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
 
+    allocations = relationship("PaymentAllocation", lazy="raise")
+
 
 class PaymentAllocation(Base):
     __tablename__ = "payment_allocations"
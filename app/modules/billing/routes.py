@@ -1,10 +1,14 @@
 """Billing routes – invoices, payments, late fees, payment methods."""
 import logging
+import time
+from functools import lru_cache
+from operator import attrgetter
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, func as sqlfunc
-from typing import Optional
+from sqlalchemy.orm import Session, joinedload, selectinload, with_loader_criteria
+from sqlalchemy import case, event, insert, lambda_stmt, or_, select, update, func as sqlfunc
+from typing import NamedTuple, Optional
 from datetime import date
+from decimal import Decimal
 from app.database import get_db
 from app.auth.dependencies import get_current_user, require_permissions
 from app.auth.models import UserAccount
@@ -16,40 +20,156 @@ from app.modules.system.models import OrgSettings
 from app.utils.event_service import emit_outbox_event
 
 logger = logging.getLogger(__name__)
-router = APIRouter(
-    prefix="/api/billing",
-    tags=["Billing"],
-    dependencies=[Depends(require_permissions(["billing", "payments", "finance", "accounting"]))],
-)
+
+# Org-owned billing tables: SELECTs on them are limited to the caller's org
+_TENANT_SCOPED = (Invoice, Payment, FxRateSnapshot, MultiCurrencyLedgerEntry, LateFeeRule)
+
+
+def _scope_to_tenant(db: Session = Depends(get_db), user: UserAccount = Depends(get_current_user)):
+    """Add the caller's tenant_org_id predicate to every ORM SELECT on this request's session."""
+    org_id = user.tenant_org_id
+    if not org_id:
+        return
+    criteria = [with_loader_criteria(m, m.tenant_org_id == org_id, include_aliases=True) for m in _TENANT_SCOPED]
+
+    @event.listens_for(db, "do_orm_execute")
+    def _add_tenant_criteria(state):
+        if state.is_select and not state.is_column_load and not state.is_relationship_load:
+            state.statement = state.statement.options(*criteria)
+
+
+def _org_filter(model, user: UserAccount) -> tuple:
+    """tenant_org_id predicate for bulk UPDATEs, which _scope_to_tenant does not reach."""
+    return (model.tenant_org_id == user.tenant_org_id,) if user.tenant_org_id else ()
+
+
+router = APIRouter(
+    prefix="/api/billing",
+    tags=["Billing"],
+    dependencies=[
+        Depends(require_permissions(["billing", "payments", "finance", "accounting"])),
+        Depends(_scope_to_tenant),
+    ],
+)
+
+
+# ISO string -> date; capped since the keys come from request bodies
+_PARSED_DATES_MAX = 4096
+_PARSED_DATES: dict[str, date] = {}
 
 
 def _parse_date(v):
-    if v in (None, ""):
+    if v is None or v == "":
         return None
+    if v.__class__ is str:
+        parsed = _PARSED_DATES.get(v)
+        if parsed is None:
+            try:
+                parsed = date.fromisoformat(v)
+            except ValueError:
+                raise HTTPException(400, "Invalid date format. Use YYYY-MM-DD")
+            if len(_PARSED_DATES) >= _PARSED_DATES_MAX:
+                _PARSED_DATES.clear()
+            _PARSED_DATES[v] = parsed
+        return parsed
     if isinstance(v, date):
         return v
-    if isinstance(v, str):
-        try:
-            return date.fromisoformat(v)
-        except ValueError:
-            raise HTTPException(400, "Invalid date format. Use YYYY-MM-DD")
     raise HTTPException(400, "Invalid date format. Use YYYY-MM-DD")
 
 
-def _latest_rate(db: Session, on_date: date, from_currency: str, to_currency: str):
-    q = db.query(ExchangeRateDaily).filter(
+class RateSnapshot(NamedTuple):
+    """Session-independent copy of the ExchangeRateDaily fields callers use."""
+    id: int
+    rate: Decimal
+
+
+# (on_date, from, to) -> (monotonic expiry, RateSnapshot or None). Any local
+# rate write clears it; the TTL bounds staleness for other workers' writes.
+_RATE_CACHE_TTL = 300
+_RATE_CACHE_MAX = 4096
+_RATE_CACHE: dict[tuple, tuple[float, Optional[RateSnapshot]]] = {}
+
+
+def _latest_rate(db: Session, on_date: date, from_currency: str, to_currency: str) -> Optional[RateSnapshot]:
+    key = (on_date, from_currency, to_currency)
+    now = time.monotonic()
+    cached = _RATE_CACHE.get(key)
+    if cached is not None and cached[0] > now:
+        return cached[1]
+    # Lambda statement: built and cache-keyed once, later calls only rebind the values
+    stmt = lambda_stmt(lambda: select(ExchangeRateDaily.id, ExchangeRateDaily.rate).where(
         ExchangeRateDaily.from_currency == from_currency,
         ExchangeRateDaily.to_currency == to_currency,
         ExchangeRateDaily.rate_date <= on_date,
-    ).order_by(ExchangeRateDaily.rate_date.desc(), ExchangeRateDaily.id.desc())
-    return q.first()
+    ).order_by(ExchangeRateDaily.rate_date.desc(), ExchangeRateDaily.id.desc()).limit(1))
+    row = db.execute(stmt).first()
+    snapshot = RateSnapshot(row.id, row.rate) if row else None
+    if len(_RATE_CACHE) >= _RATE_CACHE_MAX:
+        _RATE_CACHE.clear()
+    _RATE_CACHE[key] = (now + _RATE_CACHE_TTL, snapshot)
+    return snapshot
+
+
+@event.listens_for(ExchangeRateDaily, "after_insert")
+@event.listens_for(ExchangeRateDaily, "after_update")
+@event.listens_for(ExchangeRateDaily, "after_delete")
+def _invalidate_rates(mapper, connection, target):
+    # A new rate can become the latest for any later date, so drop everything
+    _RATE_CACHE.clear()
+
+
+# tenant_org_id -> (monotonic expiry, base currency). Local OrgSettings writes
+# evict at once; the TTL bounds staleness for changes made by other workers.
+_BASE_CURRENCY_TTL = 300
+_BASE_CURRENCY_CACHE: dict[int, tuple[float, str]] = {}
 
 
 def _tenant_base_currency(db: Session, user: UserAccount) -> str:
     if not user.tenant_org_id:
         return "USD"
-    s = db.query(OrgSettings).filter(OrgSettings.tenant_org_id == user.tenant_org_id).first()
-    return (s.base_currency if s and s.base_currency else "USD")
+    now = time.monotonic()
+    cached = _BASE_CURRENCY_CACHE.get(user.tenant_org_id)
+    if cached is not None and cached[0] > now:
+        return cached[1]
+    base = db.query(OrgSettings.base_currency).filter(OrgSettings.tenant_org_id == user.tenant_org_id).scalar()
+    currency = base or "USD"
+    _BASE_CURRENCY_CACHE[user.tenant_org_id] = (now + _BASE_CURRENCY_TTL, currency)
+    return currency
+
+
+@event.listens_for(OrgSettings, "after_insert")
+@event.listens_for(OrgSettings, "after_update")
+@event.listens_for(OrgSettings, "after_delete")
+def _invalidate_base_currency(mapper, connection, target):
+    _BASE_CURRENCY_CACHE.pop(target.tenant_org_id, None)
+
+
+def _paginate(q, order_by, skip: int, limit: int):
+    """Return (total, page) from one query, reading the total from COUNT(*) OVER ()."""
+    rows = q.add_columns(sqlfunc.count().over()).order_by(order_by).offset(skip).limit(limit).all()
+    if rows:
+        return rows[0][1], [row[0] for row in rows]
+    # Past the last page no row carries the count, so ask for it directly
+    return (q.count() if skip else 0), []
+
+
+def _latest_rates(db: Session, on_date: date):
+    """Latest rate row per currency pair on or before on_date, in one query.
+
+    ROW_NUMBER() rather than DISTINCT ON so it also runs on SQLite.
+    """
+    ranked = select(
+        ExchangeRateDaily.id,
+        ExchangeRateDaily.from_currency,
+        ExchangeRateDaily.to_currency,
+        ExchangeRateDaily.rate,
+        ExchangeRateDaily.source,
+        sqlfunc.row_number().over(
+            partition_by=(ExchangeRateDaily.from_currency, ExchangeRateDaily.to_currency),
+            order_by=(ExchangeRateDaily.rate_date.desc(), ExchangeRateDaily.id.desc()),
+        ).label("rn"),
+    ).where(ExchangeRateDaily.rate_date <= on_date).subquery()
+    return db.execute(select(ranked).where(ranked.c.rn == 1)).all()
 
 
 # ─── Invoices ───
@@ -58,20 +178,18 @@ def list_invoices(status: Optional[str] = None, tenant_id: Optional[int] = None,
                   skip: int = 0, limit: int = 50,
                   db: Session = Depends(get_db), user: UserAccount = Depends(get_current_user)):
     q = db.query(Invoice)
-    if user.tenant_org_id:
-        q = q.filter(Invoice.tenant_org_id == user.tenant_org_id)
     if status:
         q = q.filter(Invoice.invoice_status == status)
     if tenant_id:
         q = q.filter(Invoice.tenant_id == tenant_id)
-    total = q.count()
-    items = q.order_by(Invoice.id.desc()).offset(skip).limit(limit).all()
+    total, items = _paginate(q, Invoice.id.desc(), skip, limit)
     return {"total": total, "items": [_to_dict(i) for i in items]}
 
 
 @router.post("/invoices", status_code=201)
 def create_invoice(data: dict, db: Session = Depends(get_db), user: UserAccount = Depends(get_current_user)):
-    payload = {k: v for k, v in data.items() if hasattr(Invoice, k) and k != "lines"}
+    cols = _column_names(Invoice)
+    payload = {k: v for k, v in data.items() if k in cols}
     if "invoice_date" in payload:
         payload["invoice_date"] = _parse_date(payload["invoice_date"])
     if "due_date" in payload:
@@ -88,12 +206,15 @@ def create_invoice(data: dict, db: Session = Depends(get_db), user: UserAccount
     if not inv.document_currency:
         inv.document_currency = inv.base_currency or "USD"
     db.add(inv)
-    db.commit()
-    db.refresh(inv)
-    for line in data.get("lines", []):
-        il = InvoiceLine(**{k: v for k, v in line.items() if hasattr(InvoiceLine, k)})
-        il.invoice_id = inv.id
-        db.add(il)
+    # Flush for inv.id only; lines, ledger and outbox commit with it below
+    db.flush()
+    line_cols = _column_names(InvoiceLine)
+    lines = [
+        {**{k: v for k, v in line.items() if k in line_cols}, "invoice_id": inv.id}
+        for line in data.get("lines", [])
+    ]
+    if lines:
+        db.execute(insert(InvoiceLine), lines)
 
     # Set FX/base values and write ledger entry.
     fx_rate = 1.0
@@ -130,28 +251,52 @@ def create_invoice(data: dict, db: Session = Depends(get_db), user: UserAccount
         payload={"invoice_number": inv.invoice_number, "tenant_id": inv.tenant_id, "total_amount": float(inv.total_amount or 0)},
         event_key=f"invoice.created.{inv.id}",
     )
+    # Serialize before the commit expires inv: server defaults came back with
+    # the INSERT and the rest is still in memory, so no refresh SELECT
+    result = _to_dict(inv)
     db.commit()
-    db.refresh(inv)
-    return _to_dict(inv)
+    return result
+
+
+_BATCH_MAX_IDS = 500
+
+
+@router.post("/invoices/batch")
+def get_invoices_batch(data: dict, db: Session = Depends(get_db), user: UserAccount = Depends(get_current_user)):
+    """Several invoices with their lines in two queries, instead of one GET per invoice."""
+    ids = data.get("ids")
+    if not isinstance(ids, list) or not all(isinstance(i, int) for i in ids):
+        raise HTTPException(400, "ids must be a list of invoice ids")
+    if len(ids) > _BATCH_MAX_IDS:
+        raise HTTPException(400, f"At most {_BATCH_MAX_IDS} ids per request")
+    q = db.query(Invoice).options(selectinload(Invoice.lines)).filter(Invoice.id.in_(ids))
+    items = []
+    # Other orgs' ids drop out through _scope_to_tenant
+    for inv in q.order_by(Invoice.id.desc()).all():
+        d = _to_dict(inv)
+        d["lines"] = [_to_dict(l) for l in inv.lines]
+        items.append(d)
+    return {"total": len(items), "items": items}
 
 
 @router.get("/invoices/{inv_id}")
 def get_invoice(inv_id: int, db: Session = Depends(get_db), user: UserAccount = Depends(get_current_user)):
-    inv = db.query(Invoice).filter(Invoice.id == inv_id).first()
+    inv = db.query(Invoice).options(joinedload(Invoice.lines)).filter(Invoice.id == inv_id).first()
     if not inv:
         raise HTTPException(404, "Invoice not found")
     d = _to_dict(inv)
-    d["lines"] = [_to_dict(l) for l in db.query(InvoiceLine).filter(InvoiceLine.invoice_id == inv_id).all()]
+    d["lines"] = [_to_dict(l) for l in inv.lines]
     return d
 
 
 @router.put("/invoices/{inv_id}")
 def update_invoice(inv_id: int, data: dict, db: Session = Depends(get_db), user: UserAccount = Depends(get_current_user)):
-    inv = db.query(Invoice).filter(Invoice.id == inv_id).first()
+    inv = db.get(Invoice, inv_id)
     if not inv:
         raise HTTPException(404, "Invoice not found")
+    cols = _column_names(Invoice)
     for k, v in data.items():
-        if hasattr(inv, k) and k not in ("id", "created_at"):
+        if k in cols and k not in ("id", "created_at"):
             setattr(inv, k, v)
     db.commit()
     db.refresh(inv)
@@ -160,7 +305,7 @@ def update_invoice(inv_id: int, data: dict, db: Session = Depends(get_db), user:
 
 @router.post("/invoices/{inv_id}/post")
 def post_invoice(inv_id: int, db: Session = Depends(get_db), user: UserAccount = Depends(get_current_user)):
-    inv = db.query(Invoice).filter(Invoice.id == inv_id).first()
+    inv = db.get(Invoice, inv_id)
     if not inv:
         raise HTTPException(404, "Invoice not found")
     if inv.invoice_status != "Draft":
@@ -172,7 +317,7 @@ def post_invoice(inv_id: int, db: Session = Depends(get_db), user: UserAccount =
 
 @router.post("/invoices/{inv_id}/void")
 def void_invoice(inv_id: int, db: Session = Depends(get_db), user: UserAccount = Depends(get_current_user)):
-    inv = db.query(Invoice).filter(Invoice.id == inv_id).first()
+    inv = db.get(Invoice, inv_id)
     if not inv:
         raise HTTPException(404, "Invoice not found")
     inv.invoice_status = "Voided"
@@ -185,41 +330,52 @@ def void_invoice(inv_id: int, db: Session = Depends(get_db), user: UserAccount =
 def list_payments(tenant_id: Optional[int] = None, skip: int = 0, limit: int = 50,
                   db: Session = Depends(get_db), user: UserAccount = Depends(get_current_user)):
     q = db.query(Payment)
-    if user.tenant_org_id:
-        q = q.filter(Payment.tenant_org_id == user.tenant_org_id)
     if tenant_id:
         q = q.filter(Payment.tenant_id == tenant_id)
-    total = q.count()
-    items = q.order_by(Payment.id.desc()).offset(skip).limit(limit).all()
+    total, items = _paginate(q, Payment.id.desc(), skip, limit)
     return {"total": total, "items": [_to_dict(p) for p in items]}
 
 
 @router.post("/payments", status_code=201)
 def create_payment(data: dict, db: Session = Depends(get_db), user: UserAccount = Depends(get_current_user)):
-    payload = {k: v for k, v in data.items() if hasattr(Payment, k) and k != "allocations"}
+    cols = _column_names(Payment)
+    payload = {k: v for k, v in data.items() if k in cols}
     if "payment_date" in payload:
         payload["payment_date"] = _parse_date(payload["payment_date"])
     pmt = Payment(**payload)
     pmt.created_by = user.id
     if user.tenant_org_id:
-        pmt.tenant_org_id = user.tenant_org_id
+        pmt.tenant_org_id = user.tenant_org_id
     db.add(pmt)
-    db.commit()
-    db.refresh(pmt)
-    for alloc in data.get("allocations", []):
-        pa = PaymentAllocation(payment_id=pmt.id, invoice_id=alloc["invoice_id"],
-                               allocated_amount=alloc["amount"], currency=pmt.currency)
-        db.add(pa)
-        inv = db.query(Invoice).filter(Invoice.id == alloc["invoice_id"]).first()
-        if inv:
-            db.flush()
-            total_allocated = db.query(
-                sqlfunc.coalesce(sqlfunc.sum(PaymentAllocation.allocated_amount), 0)
-            ).filter(PaymentAllocation.invoice_id == inv.id).scalar()
-            if float(total_allocated) >= float(inv.total_amount or 0):
-                inv.invoice_status = "Paid"
-            else:
-                inv.invoice_status = "PartiallyPaid"
+    # Flush for pmt.id only; allocations, ledger and outbox commit with it below
+    db.flush()
+    allocations = data.get("allocations", [])
+    if allocations:
+        invoice_ids = {alloc["invoice_id"] for alloc in allocations}
+        # Scoped SELECT: another org's invoice ids are not found
+        found = set(db.scalars(select(Invoice.id).where(Invoice.id.in_(invoice_ids))))
+        if found != invoice_ids:
+            raise HTTPException(404, f"Invoice not found: {min(invoice_ids - found)}")
+        # One INSERT for all rows, then one UPDATE settling every touched invoice
+        db.execute(insert(PaymentAllocation), [
+            {"payment_id": pmt.id, "invoice_id": alloc["invoice_id"],
+             "allocated_amount": alloc["amount"], "currency": pmt.currency}
+            for alloc in allocations
+        ])
+        allocated = (
+            select(sqlfunc.coalesce(sqlfunc.sum(PaymentAllocation.allocated_amount), 0))
+            .where(PaymentAllocation.invoice_id == Invoice.id)
+            .scalar_subquery()
+        )
+        db.execute(
+            update(Invoice)
+            .where(Invoice.id.in_(invoice_ids), *_org_filter(Invoice, user))
+            .values(invoice_status=case(
+                (allocated >= sqlfunc.coalesce(Invoice.total_amount, 0), "Paid"),
+                else_="PartiallyPaid",
+            ))
+            .execution_options(synchronize_session=False)
+        )
     tenant_id_for_entries = user.tenant_org_id or pmt.tenant_org_id
     if tenant_id_for_entries:
         db.add(MultiCurrencyLedgerEntry(
@@ -245,61 +401,99 @@ def create_payment(data: dict, db: Session = Depends(get_db), user: UserAccount
         payload={"payment_number": pmt.payment_number, "tenant_id": pmt.tenant_id, "amount": float(pmt.amount or 0)},
         event_key=f"payment.received.{pmt.id}",
     )
+    result = _to_dict(pmt)
     db.commit()
-    return _to_dict(pmt)
+    return result
 
 
 @router.get("/payments/{pmt_id}")
 def get_payment(pmt_id: int, db: Session = Depends(get_db), user: UserAccount = Depends(get_current_user)):
-    pmt = db.query(Payment).filter(Payment.id == pmt_id).first()
+    pmt = db.query(Payment).options(joinedload(Payment.allocations)).filter(Payment.id == pmt_id).first()
     if not pmt:
         raise HTTPException(404, "Payment not found")
     d = _to_dict(pmt)
-    d["allocations"] = [_to_dict(a) for a in db.query(PaymentAllocation).filter(PaymentAllocation.payment_id == pmt_id).all()]
+    d["allocations"] = [_to_dict(a) for a in pmt.allocations]
     return d
 
 
 @router.post("/payments/{pmt_id}/void")
 def void_payment(pmt_id: int, db: Session = Depends(get_db), user: UserAccount = Depends(get_current_user)):
-    pmt = db.query(Payment).filter(Payment.id == pmt_id).first()
+    pmt = db.get(Payment, pmt_id)
     if not pmt:
         raise HTTPException(404, "Payment not found")
     pmt.status = "Voided"
-    # Revert allocated invoices
-    allocs = db.query(PaymentAllocation).filter(PaymentAllocation.payment_id == pmt_id).all()
-    for alloc in allocs:
-        inv = db.query(Invoice).filter(Invoice.id == alloc.invoice_id).first()
-        if inv and inv.invoice_status == "Paid":
-            inv.invoice_status = "Posted"
+    # Revert allocated invoices in one UPDATE
+    allocated_ids = select(PaymentAllocation.invoice_id).where(PaymentAllocation.payment_id == pmt_id)
+    db.query(Invoice).filter(
+        Invoice.id.in_(allocated_ids), Invoice.invoice_status == "Paid", *_org_filter(Invoice, user)
+    ).update(
+        {"invoice_status": "Posted"}, synchronize_session=False
+    )
     db.commit()
     return {"message": "Payment voided"}
 
 
+# ─── Reference data cache ───
+# (model, tenant_org_id) -> (monotonic expiry, serialized rows) for small,
+# read-mostly tables; models without an org column share the None key.
+# Local writes evict at once; the TTL bounds staleness for other workers' writes.
+_REFERENCE_TTL = 300
+_REFERENCE_CACHE: dict[tuple[type, Optional[int]], tuple[float, list[dict]]] = {}
+
+
+def _reference_rows(db: Session, model, user: UserAccount) -> list[dict]:
+    org_scoped = "tenant_org_id" in _column_names(model)
+    org_id = user.tenant_org_id if org_scoped else None
+    key = (model, org_id)
+    now = time.monotonic()
+    cached = _REFERENCE_CACHE.get(key)
+    if cached is not None and cached[0] > now:
+        return cached[1]
+    q = db.query(*_column_attrs(model))
+    if org_id:
+        q = q.filter(model.tenant_org_id == org_id)
+    rows = [row._asdict() for row in q.all()]
+    _REFERENCE_CACHE[key] = (now + _REFERENCE_TTL, rows)
+    return rows
+
+
+@event.listens_for(LateFeeRule, "after_insert")
+@event.listens_for(LateFeeRule, "after_update")
+@event.listens_for(LateFeeRule, "after_delete")
+@event.listens_for(PaymentMethod, "after_insert")
+@event.listens_for(PaymentMethod, "after_update")
+@event.listens_for(PaymentMethod, "after_delete")
+def _invalidate_reference_rows(mapper, connection, target):
+    # Every org's entry: org-less users see all orgs' rows, and an update may move a row
+    for key in [k for k in _REFERENCE_CACHE if k[0] is mapper.class_]:
+        _REFERENCE_CACHE.pop(key, None)
+
+
 # ─── Late Fee Rules ───
 @router.get("/late-fee-rules")
 def list_late_fee_rules(db: Session = Depends(get_db), user: UserAccount = Depends(get_current_user)):
-    items = db.query(LateFeeRule).all()
-    return {"total": len(items), "items": [_to_dict(r) for r in items]}
+    items = _reference_rows(db, LateFeeRule, user)
+    return {"total": len(items), "items": items}
 
 
 @router.post("/late-fee-rules", status_code=201)
 def create_late_fee_rule(data: dict, db: Session = Depends(get_db), user: UserAccount = Depends(get_current_user)):
-    rule = LateFeeRule(**{k: v for k, v in data.items() if hasattr(LateFeeRule, k)})
+    cols = _column_names(LateFeeRule)
+    rule = LateFeeRule(**{k: v for k, v in data.items() if k in cols})
     if user.tenant_org_id:
         rule.tenant_org_id = user.tenant_org_id
     db.add(rule)
-    db.commit()
-    db.refresh(rule)
-    return _to_dict(rule)
+    return _insert_and_serialize(db, rule)
 
 
 @router.put("/late-fee-rules/{rule_id}")
 def update_late_fee_rule(rule_id: int, data: dict, db: Session = Depends(get_db), user: UserAccount = Depends(get_current_user)):
-    rule = db.query(LateFeeRule).filter(LateFeeRule.id == rule_id).first()
+    rule = db.get(LateFeeRule, rule_id)
     if not rule:
         raise HTTPException(404, "Rule not found")
+    cols = _column_names(LateFeeRule)
     for k, v in data.items():
-        if hasattr(rule, k) and k not in ("id",):
+        if k in cols and k != "id":
             setattr(rule, k, v)
     db.commit()
     db.refresh(rule)
@@ -308,7 +502,7 @@ def update_late_fee_rule(rule_id: int, data: dict, db: Session = Depends(get_db)
 
 @router.delete("/late-fee-rules/{rule_id}")
 def delete_late_fee_rule(rule_id: int, db: Session = Depends(get_db), user: UserAccount = Depends(get_current_user)):
-    rule = db.query(LateFeeRule).filter(LateFeeRule.id == rule_id).first()
+    rule = db.get(LateFeeRule, rule_id)
     if not rule:
         raise HTTPException(404, "Rule not found")
     db.delete(rule)
@@ -319,26 +513,26 @@ def delete_late_fee_rule(rule_id: int, db: Session = Depends(get_db), user: User
 # ─── Payment Methods ───
 @router.get("/payment-methods")
 def list_payment_methods(db: Session = Depends(get_db), user: UserAccount = Depends(get_current_user)):
-    items = db.query(PaymentMethod).all()
-    return {"total": len(items), "items": [_to_dict(m) for m in items]}
+    items = _reference_rows(db, PaymentMethod, user)
+    return {"total": len(items), "items": items}
 
 
 @router.post("/payment-methods", status_code=201)
 def create_payment_method(data: dict, db: Session = Depends(get_db), user: UserAccount = Depends(get_current_user)):
-    method = PaymentMethod(**{k: v for k, v in data.items() if hasattr(PaymentMethod, k)})
+    cols = _column_names(PaymentMethod)
+    method = PaymentMethod(**{k: v for k, v in data.items() if k in cols})
     db.add(method)
-    db.commit()
-    db.refresh(method)
-    return _to_dict(method)
+    return _insert_and_serialize(db, method)
 
 
 @router.put("/payment-methods/{method_id}")
 def update_payment_method(method_id: int, data: dict, db: Session = Depends(get_db), user: UserAccount = Depends(get_current_user)):
-    method = db.query(PaymentMethod).filter(PaymentMethod.id == method_id).first()
+    method = db.get(PaymentMethod, method_id)
     if not method:
         raise HTTPException(404, "Payment method not found")
+    cols = _column_names(PaymentMethod)
     for k, v in data.items():
-        if hasattr(method, k) and k not in ("id",):
+        if k in cols and k != "id":
             setattr(method, k, v)
     db.commit()
     db.refresh(method)
@@ -353,7 +547,8 @@ def list_fx_rates(
     db: Session = Depends(get_db),
     user: UserAccount = Depends(get_current_user),
 ):
-    q = db.query(ExchangeRateDaily)
+    # Plain column rows: read-only list, no ORM instances or identity map
+    q = db.query(*_column_attrs(ExchangeRateDaily))
     if from_currency:
         q = q.filter(ExchangeRateDaily.from_currency == from_currency)
     if to_currency:
@@ -361,20 +556,19 @@ def list_fx_rates(
     if rate_date:
         q = q.filter(ExchangeRateDaily.rate_date == _parse_date(rate_date))
     items = q.order_by(ExchangeRateDaily.rate_date.desc(), ExchangeRateDaily.id.desc()).limit(500).all()
-    return {"total": len(items), "items": [_to_dict(x) for x in items]}
+    return {"total": len(items), "items": [x._asdict() for x in items]}
 
 
 @router.post("/fx-rates", status_code=201)
 def create_fx_rate(data: dict, db: Session = Depends(get_db), user: UserAccount = Depends(get_current_user)):
-    d = {k: v for k, v in data.items() if hasattr(ExchangeRateDaily, k)}
+    cols = _column_names(ExchangeRateDaily)
+    d = {k: v for k, v in data.items() if k in cols}
     if not d.get("rate_date"):
         raise HTTPException(400, "rate_date is required")
     d["rate_date"] = _parse_date(d["rate_date"])
     item = ExchangeRateDaily(**d)
     db.add(item)
-    db.commit()
-    db.refresh(item)
-    return _to_dict(item)
+    return _insert_and_serialize(db, item)
 
 
 @router.post("/fx-snapshots/generate", status_code=201)
@@ -382,30 +576,24 @@ def generate_fx_snapshot(data: dict, db: Session = Depends(get_db), user: UserAc
     if not user.tenant_org_id:
         raise HTTPException(400, "User not associated with tenant org")
     snapshot_date = _parse_date(data.get("snapshot_date")) or date.today()
-    q = db.query(ExchangeRateDaily).filter(ExchangeRateDaily.rate_date <= snapshot_date)
-    rows = q.order_by(ExchangeRateDaily.rate_date.desc(), ExchangeRateDaily.id.desc()).all()
-    latest_by_pair = {}
-    for r in rows:
-        key = (r.from_currency, r.to_currency)
-        if key not in latest_by_pair:
-            latest_by_pair[key] = r
-
-    created = []
-    for pair, r in latest_by_pair.items():
-        s = FxRateSnapshot(
-            tenant_org_id=user.tenant_org_id,
-            snapshot_date=snapshot_date,
-            from_currency=r.from_currency,
-            to_currency=r.to_currency,
-            rate=r.rate,
-            source=r.source,
-            exchange_rate_daily_id=r.id,
-            created_by=user.id,
-        )
-        db.add(s)
-        created.append(s)
+    rows = _latest_rates(db, snapshot_date)
+
+    if rows:
+        db.execute(insert(FxRateSnapshot), [
+            {
+                "tenant_org_id": user.tenant_org_id,
+                "snapshot_date": snapshot_date,
+                "from_currency": r.from_currency,
+                "to_currency": r.to_currency,
+                "rate": r.rate,
+                "source": r.source,
+                "exchange_rate_daily_id": r.id,
+                "created_by": user.id,
+            }
+            for r in rows
+        ])
     db.commit()
-    return {"snapshot_date": str(snapshot_date), "created": len(created)}
+    return {"snapshot_date": str(snapshot_date), "created": len(rows)}
 
 
 @router.get("/fx-snapshots")
@@ -416,9 +604,7 @@ def list_fx_snapshots(
     db: Session = Depends(get_db),
     user: UserAccount = Depends(get_current_user),
 ):
-    q = db.query(FxRateSnapshot)
-    if user.tenant_org_id:
-        q = q.filter(FxRateSnapshot.tenant_org_id == user.tenant_org_id)
+    q = db.query(*_column_attrs(FxRateSnapshot))
     if snapshot_date:
         q = q.filter(FxRateSnapshot.snapshot_date == _parse_date(snapshot_date))
     if from_currency:
@@ -426,15 +612,12 @@ def list_fx_snapshots(
     if to_currency:
         q = q.filter(FxRateSnapshot.to_currency == to_currency)
     items = q.order_by(FxRateSnapshot.snapshot_date.desc(), FxRateSnapshot.id.desc()).limit(1000).all()
-    return {"total": len(items), "items": [_to_dict(x) for x in items]}
+    return {"total": len(items), "items": [x._asdict() for x in items]}
 
 
 @router.post("/invoices/{inv_id}/revalue")
 def revalue_invoice(inv_id: int, data: dict, db: Session = Depends(get_db), user: UserAccount = Depends(get_current_user)):
-    q = db.query(Invoice).filter(Invoice.id == inv_id)
-    if user.tenant_org_id:
-        q = q.filter(Invoice.tenant_org_id == user.tenant_org_id)
-    inv = q.first()
+    inv = db.get(Invoice, inv_id)
     if not inv:
         raise HTTPException(404, "Invoice not found")
     as_of = _parse_date(data.get("as_of")) or date.today()
@@ -480,6 +663,83 @@ def revalue_invoice(inv_id: int, data: dict, db: Session = Depends(get_db), user
     return {"invoice": _to_dict(inv), "gain_loss": gain_loss}
 
 
+@router.post("/invoices/revalue-batch")
+def revalue_invoices_batch(data: dict, db: Session = Depends(get_db), user: UserAccount = Depends(get_current_user)):
+    """Revalue the org's foreign-currency invoices (optionally only `ids`) as of a date.
+
+    Same result per invoice as /invoices/{id}/revalue, but the rates, invoice
+    updates and ledger rows each take one statement for the whole batch.
+    """
+    if not user.tenant_org_id:
+        raise HTTPException(400, "User not associated with tenant org")
+    as_of = _parse_date(data.get("as_of")) or date.today()
+    q = db.query(
+        Invoice.id, Invoice.invoice_number, Invoice.document_currency, Invoice.base_currency,
+        Invoice.document_amount, Invoice.base_amount,
+    ).filter(
+        sqlfunc.coalesce(Invoice.document_currency, "USD") != sqlfunc.coalesce(Invoice.base_currency, "USD"),
+    )
+    ids = data.get("ids")
+    if ids is not None:
+        if not isinstance(ids, list) or not all(isinstance(i, int) for i in ids):
+            raise HTTPException(400, "ids must be a list of invoice ids")
+        q = q.filter(Invoice.id.in_(ids))
+    invoices = q.all()
+    rates = {(r.from_currency, r.to_currency): r for r in _latest_rates(db, as_of)}
+
+    updates, entries, skipped = [], [], []
+    total_gain_loss = 0.0
+    for inv in invoices:
+        rate_row = rates.get((inv.document_currency, inv.base_currency))
+        if rate_row is None:
+            skipped.append(inv.id)
+            continue
+        new_base = float(inv.document_amount or 0) * float(rate_row.rate or 1)
+        gain_loss = new_base - float(inv.base_amount or 0)
+        total_gain_loss += gain_loss
+        updates.append({
+            "id": inv.id,
+            "base_amount": new_base,
+            "exchange_rate_id": rate_row.id,
+            "exchange_rate_value": rate_row.rate,
+            "fx_difference_amount": gain_loss,
+        })
+        entries.append({
+            "tenant_org_id": user.tenant_org_id,
+            "reference_type": "Revaluation",
+            "reference_id": inv.id,
+            "posting_date": as_of,
+            "txn_currency": inv.document_currency or "USD",
+            "txn_amount": inv.document_amount or 0,
+            "base_currency": inv.base_currency or "USD",
+            "base_amount": new_base,
+            "fx_rate": rate_row.rate,
+            "entry_side": "Debit" if gain_loss >= 0 else "Credit",
+            "notes": f"FX revaluation for invoice {inv.invoice_number}",
+            "created_by": user.id,
+        })
+        emit_outbox_event(
+            db=db,
+            tenant_org_id=user.tenant_org_id,
+            event_type="invoice.revalued",
+            aggregate_type="Invoice",
+            aggregate_id=inv.id,
+            payload={"invoice_number": inv.invoice_number, "as_of": str(as_of), "gain_loss": gain_loss},
+            event_key=f"invoice.revalued.{inv.id}.{as_of}",
+        )
+    if updates:
+        # Bulk UPDATE by primary key and one multi-row ledger INSERT
+        db.execute(update(Invoice), updates)
+        db.execute(insert(MultiCurrencyLedgerEntry), entries)
+    db.commit()
+    return {
+        "as_of": str(as_of),
+        "revalued": len(updates),
+        "skipped": skipped,
+        "total_gain_loss": total_gain_loss,
+    }
+
+
 @router.get("/ledger-entries")
 def list_ledger_entries(
     reference_type: Optional[str] = None,
@@ -487,16 +747,46 @@ def list_ledger_entries(
     db: Session = Depends(get_db),
     user: UserAccount = Depends(get_current_user),
 ):
-    q = db.query(MultiCurrencyLedgerEntry)
-    if user.tenant_org_id:
-        q = q.filter(MultiCurrencyLedgerEntry.tenant_org_id == user.tenant_org_id)
+    q = db.query(*_column_attrs(MultiCurrencyLedgerEntry))
     if reference_type:
         q = q.filter(MultiCurrencyLedgerEntry.reference_type == reference_type)
     if reference_id:
         q = q.filter(MultiCurrencyLedgerEntry.reference_id == reference_id)
     items = q.order_by(MultiCurrencyLedgerEntry.id.desc()).limit(500).all()
-    return {"total": len(items), "items": [_to_dict(x) for x in items]}
+    return {"total": len(items), "items": [x._asdict() for x in items]}
+
+
+@lru_cache(maxsize=None)
+def _columns(model):
+    """Column names of a model plus one attrgetter fetching them all, built once per class."""
+    names = tuple(c.name for c in model.__table__.columns)
+    return names, attrgetter(*names)
+
+
+@lru_cache(maxsize=None)
+def _column_attrs(model) -> tuple:
+    """Mapped column attributes; column queries built from these keep the tenant criteria."""
+    return tuple(getattr(model, name) for name in _columns(model)[0])
+
+
+@lru_cache(maxsize=None)
+def _column_names(model) -> frozenset:
+    """Column names of a model as a set, for filtering request payloads."""
+    return frozenset(_columns(model)[0])
 
 
 def _to_dict(obj):
-    return {c.name: getattr(obj, c.name) for c in obj.__table__.columns}
+    names, getter = _columns(type(obj))
+    return dict(zip(names, getter(obj)))
+
+
+def _insert_and_serialize(db: Session, obj) -> dict:
+    """Flush a new row, serialize it, then commit.
+
+    The INSERT returns server defaults (created_at) with RETURNING, so reading
+    the row before the commit expires it needs no refresh SELECT.
+    """
+    db.flush()
+    result = _to_dict(obj)
+    db.commit()
+    return result
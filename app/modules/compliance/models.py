@@ -1,5 +1,6 @@
 """Compliance models – Document, DocumentType, ComplianceRequirement, ComplianceItem, Inspection."""
 from sqlalchemy import Column, Integer, String, Boolean, DateTime, Date, ForeignKey, Text
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
 
@@ -56,6 +57,8 @@ class ComplianceItem(Base):
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
 
+    requirement = relationship("ComplianceRequirement", lazy="raise")
+
 
 class Inspection(Base):
     __tablename__ = "inspections"
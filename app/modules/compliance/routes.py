@@ -1,27 +1,37 @@
 """Compliance API routes – requirements, documents, inspections, compliance items."""
+import json
 import os
+import re
 import shutil
 from datetime import date, datetime
+from functools import lru_cache
 from uuid import uuid4
+import aiofiles
 from fastapi import APIRouter, Depends, HTTPException, File, Form, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
 from typing import Optional
 from app.database import get_db
 from app.auth.dependencies import get_current_user, require_permissions
 from app.auth.models import UserAccount
-from app.config import get_settings
 from app.modules.compliance.models import (
     ComplianceRequirement, Document, DocumentType, Inspection, ComplianceItem,
     DocumentVersion, DocumentObligation
 )
 from app.utils.event_service import emit_outbox_event
+from app.utils.upload_cleanup_service import remove_upload, upload_root
 
 router = APIRouter(
     prefix="/api/compliance",
     tags=["Compliance"],
     dependencies=[Depends(require_permissions(["compliance", "portfolio"]))],
 )
-settings = get_settings()
+
+_UPLOAD_CHUNK_SIZE = 1 << 20
+_MAX_UPLOAD_CHUNKS = 10000
+_UPLOAD_ID_RE = re.compile(r"[0-9a-f]{32}")
+_BULK_MAX_ROWS = 500
 
 
 def _parse_iso_date(value, field_name: str) -> Optional[date]:
@@ -37,97 +47,122 @@ def _parse_iso_date(value, field_name: str) -> Optional[date]:
     raise HTTPException(400, f"Invalid value for '{field_name}'. Expected YYYY-MM-DD")
 
 
+def _to_int(value, field_name: str) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_bool(value, field_name: str) -> bool:
+    return value if isinstance(value, bool) else str(value).lower() in ("1", "true", "yes", "on")
+
+
+def _identity(value, field_name: str):
+    return value
+
+
+def _writable_columns(model, *excluded: str) -> frozenset:
+    return frozenset(c.name for c in model.__table__.columns) - set(excluded)
+
+
+# Sanitizer tables, built once at import: writable columns per model plus a
+# per-field coercer; fields without a coercer pass through unchanged.
+_REQUIREMENT_FIELDS = _writable_columns(ComplianceRequirement, "id", "created_at")
+_REQUIREMENT_COERCERS = {"document_type_id": _to_int, "tenant_org_id": _to_int, "is_active": _to_bool}
+_DOCUMENT_FIELDS = _writable_columns(Document, "id", "created_at", "upload_date")
+_DOCUMENT_COERCERS = {
+    "owner_entity_id": _to_int, "document_type_id": _to_int, "version_number": _to_int, "tenant_org_id": _to_int,
+    "is_signed": _to_bool, "expiry_date": _parse_iso_date,
+}
+_INSPECTION_FIELDS = _writable_columns(Inspection, "id", "created_at", "updated_at")
+_INSPECTION_COERCERS = {
+    "property_id": _to_int, "unit_id": _to_int, "inspector_id": _to_int, "tenant_org_id": _to_int,
+    "scheduled_date": _parse_iso_date, "completed_date": _parse_iso_date,
+}
+_COMPLIANCE_ITEM_FIELDS = _writable_columns(ComplianceItem, "id", "created_at", "updated_at")
+_COMPLIANCE_ITEM_COERCERS = {
+    "requirement_id": _to_int, "entity_id": _to_int, "escalation_level": _to_int, "due_date": _parse_iso_date,
+}
+
+
+def _sanitize(data: dict, fields: frozenset, coercers: dict) -> dict:
+    return {
+        k: None if v in ("", None) else coercers.get(k, _identity)(v, k)
+        for k, v in data.items() if k in fields
+    }
+
+
 def _sanitize_requirement_data(data: dict) -> dict:
-    clean = {}
-    for k, v in data.items():
-        if not hasattr(ComplianceRequirement, k) or k in ("id", "created_at"):
-            continue
-        if v in ("", None):
-            clean[k] = None
-        elif k in {"document_type_id", "tenant_org_id"}:
-            try:
-                clean[k] = int(v)
-            except (TypeError, ValueError):
-                clean[k] = None
-        elif k == "is_active":
-            clean[k] = v if isinstance(v, bool) else str(v).lower() in ("1", "true", "yes", "on")
-        else:
-            clean[k] = v
-    return clean
+    return _sanitize(data, _REQUIREMENT_FIELDS, _REQUIREMENT_COERCERS)
 
 
 def _sanitize_document_data(data: dict) -> dict:
-    clean = {}
-    int_fields = {"owner_entity_id", "document_type_id", "version_number", "tenant_org_id"}
-    bool_fields = {"is_signed"}
-    date_fields = {"expiry_date"}
-    for k, v in data.items():
-        if not hasattr(Document, k) or k in ("id", "created_at", "upload_date"):
-            continue
-        if v in ("", None):
-            clean[k] = None
-        elif k in int_fields:
-            try:
-                clean[k] = int(v)
-            except (TypeError, ValueError):
-                clean[k] = None
-        elif k in bool_fields:
-            clean[k] = v if isinstance(v, bool) else str(v).lower() in ("1", "true", "yes", "on")
-        elif k in date_fields:
-            clean[k] = _parse_iso_date(v, k)
-        else:
-            clean[k] = v
-    return clean
+    return _sanitize(data, _DOCUMENT_FIELDS, _DOCUMENT_COERCERS)
 
 
 def _sanitize_inspection_data(data: dict) -> dict:
-    clean = {}
-    int_fields = {"property_id", "unit_id", "inspector_id", "tenant_org_id"}
-    date_fields = {"scheduled_date", "completed_date"}
-    for k, v in data.items():
-        if not hasattr(Inspection, k) or k in ("id", "created_at", "updated_at"):
-            continue
-        if v in ("", None):
-            clean[k] = None
-        elif k in int_fields:
-            try:
-                clean[k] = int(v)
-            except (TypeError, ValueError):
-                clean[k] = None
-        elif k in date_fields:
-            clean[k] = _parse_iso_date(v, k)
-        else:
-            clean[k] = v
-    return clean
+    return _sanitize(data, _INSPECTION_FIELDS, _INSPECTION_COERCERS)
 
 
 def _sanitize_compliance_item_data(data: dict) -> dict:
-    clean = {}
-    int_fields = {"requirement_id", "entity_id", "escalation_level"}
-    date_fields = {"due_date"}
-    for k, v in data.items():
-        if not hasattr(ComplianceItem, k) or k in ("id", "created_at", "updated_at"):
-            continue
-        if v in ("", None):
-            clean[k] = None
-        elif k in int_fields:
-            try:
-                clean[k] = int(v)
-            except (TypeError, ValueError):
-                clean[k] = None
-        elif k in date_fields:
-            clean[k] = _parse_iso_date(v, k)
-        else:
-            clean[k] = v
-    return clean
+    return _sanitize(data, _COMPLIANCE_ITEM_FIELDS, _COMPLIANCE_ITEM_COERCERS)
 
 
 def _compliance_upload_dir() -> str:
-    upload_dir = settings.UPLOAD_DIR
-    if not os.path.isabs(upload_dir):
-        project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
-        upload_dir = os.path.join(project_root, upload_dir)
-    return os.path.abspath(upload_dir)
+    return upload_root()
+
+
+def _upload_target(user: UserAccount, file_name: Optional[str]):
+    """Return (safe_name, absolute_path, public_path) for a new compliance file."""
+    safe_name = os.path.basename(file_name or "document")
+    ext = os.path.splitext(safe_name)[1]
+    stored_name = f"{datetime.utcnow().strftime('%Y%m%d%H%M%S')}_{uuid4().hex[:8]}{ext}"
+    tenant_folder = str(user.tenant_org_id) if user.tenant_org_id else "global"
+    save_dir = os.path.join(_compliance_upload_dir(), "compliance", tenant_folder)
+    os.makedirs(save_dir, exist_ok=True)
+    return safe_name, os.path.join(save_dir, stored_name), f"/uploads/compliance/{tenant_folder}/{stored_name}"
+
+
+async def _iter_upload(file: UploadFile, max_bytes: Optional[int] = None):
+    received = 0
+    while chunk := await file.read(_UPLOAD_CHUNK_SIZE):
+        received += len(chunk)
+        if max_bytes is not None and received > max_bytes:
+            raise HTTPException(413, f"Upload exceeds {max_bytes} bytes")
+        yield chunk
+
+
+async def _iter_files(paths):
+    for path in paths:
+        async with aiofiles.open(path, "rb") as src:
+            while chunk := await src.read(_UPLOAD_CHUNK_SIZE):
+                yield chunk
+
+
+async def _save_upload(file: UploadFile, absolute_path: str, max_bytes: Optional[int] = None) -> None:
+    """Stream an upload to disk in fixed-size chunks without blocking the event loop.
+
+    Past max_bytes the transfer is rejected with a 413 and nothing is kept.
+    """
+    await _write_atomically(absolute_path, _iter_upload(file, max_bytes))
+
+
+async def _write_atomically(absolute_path: str, chunks) -> None:
+    """Write an async byte stream to a sibling .part file, then rename it into place.
+
+    A failed transfer never leaves a truncated file at the final path.
+    """
+    partial_path = absolute_path + ".part"
+    try:
+        async with aiofiles.open(partial_path, "wb") as out:
+            async for chunk in chunks:
+                await out.write(chunk)
+        os.replace(partial_path, absolute_path)
+    except BaseException:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
 
 
 def _document_query_for_user(db: Session, user: UserAccount):
@@ -177,15 +212,16 @@ def _create_document_expiry_obligation(db: Session, user: UserAccount, doc: Docu
 
 # --- Requirements ---
 @router.get("/requirements")
-def list_requirements(entity_type: Optional[str] = None, db: Session = Depends(get_db),
-                      user: UserAccount = Depends(get_current_user)):
-    q = db.query(ComplianceRequirement).filter(ComplianceRequirement.is_active == True)
+def list_requirements(entity_type: Optional[str] = None, skip: int = 0, limit: int = 50,
+                      db: Session = Depends(get_db), user: UserAccount = Depends(get_current_user)):
+    q = db.query(*_column_attrs(ComplianceRequirement)).filter(ComplianceRequirement.is_active == True)
     if entity_type:
         q = q.filter(ComplianceRequirement.entity_type == entity_type)
     if user.tenant_org_id:
         q = q.filter(ComplianceRequirement.tenant_org_id == user.tenant_org_id)
-    items = q.all()
-    return {"total": len(items), "items": [_dict(x) for x in items]}
+    total = q.count()
+    items = q.order_by(ComplianceRequirement.id).offset(skip).limit(limit).all()
+    return {"total": total, "items": [x._asdict() for x in items]}
 
 
 @router.post("/requirements", status_code=201)
@@ -196,12 +232,27 @@ def create_requirement(data: dict, db: Session = Depends(get_db), user: UserAcco
     r = ComplianceRequirement(**clean)
     if user.tenant_org_id:
         r.tenant_org_id = user.tenant_org_id
-    db.add(r)
-    db.commit()
-    db.refresh(r)
+    db.add(r)
+    db.commit()
+    db.refresh(r)
     return _dict(r)
 
 
+@router.post("/requirements/bulk", status_code=201)
+def create_requirements_bulk(data: list[dict], db: Session = Depends(get_db),
+                             user: UserAccount = Depends(get_current_user)):
+    rows = []
+    for i, item in enumerate(_check_bulk_size(data)):
+        clean = _sanitize_requirement_data(item)
+        if not clean.get("requirement_name"):
+            raise HTTPException(400, f"Row {i}: field 'requirement_name' is required")
+        if user.tenant_org_id:
+            clean["tenant_org_id"] = user.tenant_org_id
+        rows.append(clean)
+    items = _bulk_insert(db, ComplianceRequirement, rows)
+    return {"total": len(items), "items": items}
+
+
 @router.put("/requirements/{req_id}")
 def update_requirement(req_id: int, data: dict, db: Session = Depends(get_db), user: UserAccount = Depends(get_current_user)):
     q = db.query(ComplianceRequirement).filter(ComplianceRequirement.id == req_id)
@@ -235,8 +286,8 @@ def delete_requirement(req_id: int, db: Session = Depends(get_db), user: UserAcc
 # --- Document Types ---
 @router.get("/document-types")
 def list_document_types(db: Session = Depends(get_db), user: UserAccount = Depends(get_current_user)):
-    items = db.query(DocumentType).all()
-    return {"total": len(items), "items": [_dict(x) for x in items]}
+    items = db.query(*_column_attrs(DocumentType)).all()
+    return {"total": len(items), "items": [x._asdict() for x in items]}
 
 
 @router.post("/document-types", status_code=201)
@@ -273,13 +324,16 @@ def delete_document_type(dt_id: int, db: Session = Depends(get_db), user: UserAc
 
 # --- Documents ---
 @router.get("/documents")
-def list_documents(expiry_before: Optional[date] = None, db: Session = Depends(get_db),
-                   user: UserAccount = Depends(get_current_user)):
-    q = _document_query_for_user(db, user)
+def list_documents(expiry_before: Optional[date] = None, skip: int = 0, limit: int = 50,
+                   db: Session = Depends(get_db), user: UserAccount = Depends(get_current_user)):
+    q = db.query(*_column_attrs(Document))
+    if user.tenant_org_id:
+        q = q.filter(Document.tenant_org_id == user.tenant_org_id)
     if expiry_before:
         q = q.filter(Document.expiry_date <= expiry_before)
-    items = q.order_by(Document.id.desc()).all()
-    return {"total": len(items), "items": [_dict(x) for x in items]}
+    total = q.count()
+    items = q.order_by(Document.id.desc()).offset(skip).limit(limit).all()
+    return {"total": total, "items": [x._asdict() for x in items]}
 
 
 @router.post("/documents", status_code=201)
@@ -326,18 +380,8 @@ async def upload_document(
     db: Session = Depends(get_db),
     user: UserAccount = Depends(get_current_user),
 ):
-    safe_name = os.path.basename(file.filename or "document")
-    ext = os.path.splitext(safe_name)[1]
-    stored_name = f"{datetime.utcnow().strftime('%Y%m%d%H%M%S')}_{uuid4().hex[:8]}{ext}"
-    tenant_folder = str(user.tenant_org_id) if user.tenant_org_id else "global"
-
-    upload_root = _compliance_upload_dir()
-    save_dir = os.path.join(upload_root, "compliance", tenant_folder)
-    os.makedirs(save_dir, exist_ok=True)
-
-    absolute_path = os.path.join(save_dir, stored_name)
-    with open(absolute_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    safe_name, absolute_path, public_path = await run_in_threadpool(_upload_target, user, file.filename)
+    await _save_upload(file, absolute_path)
 
     doc = Document(
         tenant_org_id=user.tenant_org_id,
@@ -345,11 +389,17 @@ async def upload_document(
         owner_entity_id=owner_entity_id,
         document_type_id=document_type_id,
         file_name=safe_name,
-        file_path=f"/uploads/compliance/{tenant_folder}/{stored_name}",
+        file_path=public_path,
         mime_type=file.content_type,
         expiry_date=_parse_iso_date(expiry_date, "expiry_date"),
         is_signed=bool(is_signed),
     )
+    # The handler is async for the multipart read; keep the blocking
+    # session work on a worker thread so it never stalls the event loop.
+    return await run_in_threadpool(_record_uploaded_document, db, user, doc)
+
+
+def _record_uploaded_document(db: Session, user: UserAccount, doc: Document) -> dict:
     db.add(doc)
     db.flush()
     _create_initial_document_version(db, user, doc, notes="Initial uploaded document version")
@@ -368,28 +418,161 @@ async def upload_document(
     return _dict(doc)
 
 
+# Chunked uploads: init opens a session, chunks may arrive in any order (or in
+# parallel) and be re-sent after a failure, complete concatenates them in index
+# order and records the document like a single-shot upload.
+#
+# complete claims the session by renaming its directory to "<id>.completing",
+# so only one caller ever builds the document; on success it leaves a
+# "<id>.done" marker holding the document id, which repeat calls answer from.
+def _chunk_session_dir(upload_id: str) -> str:
+    return os.path.join(_compliance_upload_dir(), "compliance", ".chunks", upload_id)
+
+
+async def _read_json(path: str) -> dict:
+    async with aiofiles.open(path, "r") as f:
+        return json.loads(await f.read())
+
+
+async def _load_chunk_session(upload_id: str, user: UserAccount) -> dict:
+    manifest_path = os.path.join(_chunk_session_dir(upload_id), "manifest.json")
+    if not _UPLOAD_ID_RE.fullmatch(upload_id) or not os.path.exists(manifest_path):
+        raise HTTPException(404, "Upload session not found")
+    manifest = await _read_json(manifest_path)
+    if manifest["uploaded_by"] != user.id:
+        raise HTTPException(404, "Upload session not found")
+    return manifest
+
+
+def _received_chunks(session_dir: str) -> list:
+    return sorted(int(name) for name in os.listdir(session_dir) if name.isdigit())
+
+
+@router.post("/documents/upload/init", status_code=201)
+async def init_chunked_upload(data: dict, user: UserAccount = Depends(get_current_user)):
+    clean = _sanitize_document_data(data)
+    if not clean.get("owner_entity_type"):
+        raise HTTPException(400, "Field 'owner_entity_type' is required")
+    if not clean.get("owner_entity_id"):
+        raise HTTPException(400, "Field 'owner_entity_id' is required")
+    if not clean.get("file_name"):
+        raise HTTPException(400, "Field 'file_name' is required")
+    total_chunks = _to_int(data.get("total_chunks"), "total_chunks")
+    if not total_chunks or not 0 < total_chunks <= _MAX_UPLOAD_CHUNKS:
+        raise HTTPException(400, f"Field 'total_chunks' must be between 1 and {_MAX_UPLOAD_CHUNKS}")
+
+    upload_id = uuid4().hex
+    session_dir = _chunk_session_dir(upload_id)
+    await run_in_threadpool(os.makedirs, session_dir)
+    manifest = {
+        "uploaded_by": user.id,
+        "total_chunks": total_chunks,
+        "owner_entity_type": clean["owner_entity_type"],
+        "owner_entity_id": clean["owner_entity_id"],
+        "document_type_id": clean.get("document_type_id"),
+        "file_name": clean["file_name"],
+        "mime_type": clean.get("mime_type"),
+        "expiry_date": clean["expiry_date"].isoformat() if clean.get("expiry_date") else None,
+        "is_signed": bool(clean.get("is_signed")),
+    }
+    async with aiofiles.open(os.path.join(session_dir, "manifest.json"), "w") as f:
+        await f.write(json.dumps(manifest))
+    return {"upload_id": upload_id, "total_chunks": total_chunks, "chunk_size": _UPLOAD_CHUNK_SIZE}
+
+
+@router.get("/documents/upload/{upload_id}")
+async def get_chunked_upload(upload_id: str, user: UserAccount = Depends(get_current_user)):
+    manifest = await _load_chunk_session(upload_id, user)
+    received = await run_in_threadpool(_received_chunks, _chunk_session_dir(upload_id))
+    return {"upload_id": upload_id, "total_chunks": manifest["total_chunks"], "received": received}
+
+
+@router.post("/documents/upload/chunk")
+async def upload_document_chunk(
+    upload_id: str = Form(...),
+    index: int = Form(...),
+    chunk: UploadFile = File(...),
+    user: UserAccount = Depends(get_current_user),
+):
+    manifest = await _load_chunk_session(upload_id, user)
+    if not 0 <= index < manifest["total_chunks"]:
+        raise HTTPException(400, f"Chunk index must be between 0 and {manifest['total_chunks'] - 1}")
+    # Re-sending an index replaces it atomically, which is what makes retries resumable
+    await _save_upload(chunk, os.path.join(_chunk_session_dir(upload_id), f"{index:06d}"), _UPLOAD_CHUNK_SIZE)
+    return {"upload_id": upload_id, "index": index}
+
+
+@router.post("/documents/upload/complete", status_code=201)
+async def complete_chunked_upload(data: dict, db: Session = Depends(get_db),
+                                  user: UserAccount = Depends(get_current_user)):
+    upload_id = str(data.get("upload_id") or "")
+    session_dir = _chunk_session_dir(upload_id)
+    done_path = session_dir + ".done"
+    if _UPLOAD_ID_RE.fullmatch(upload_id) and os.path.exists(done_path):
+        # A retry of a completion that already succeeded gets the same document back
+        done = await _read_json(done_path)
+        if done["uploaded_by"] != user.id:
+            raise HTTPException(404, "Upload session not found")
+        doc = await run_in_threadpool(_get_document_for_user, db, user, done["document_id"])
+        return _dict(doc)
+
+    try:
+        manifest = await _load_chunk_session(upload_id, user)
+    except HTTPException:
+        if _UPLOAD_ID_RE.fullmatch(upload_id) and os.path.exists(session_dir + ".completing"):
+            raise HTTPException(409, "Upload is already being completed")
+        raise
+    received = set(await run_in_threadpool(_received_chunks, session_dir))
+    missing = [i for i in range(manifest["total_chunks"]) if i not in received]
+    if missing:
+        raise HTTPException(400, f"Upload incomplete, missing chunks: {missing[:20]}")
+
+    # The rename is atomic: of several concurrent completes exactly one wins
+    claimed_dir = session_dir + ".completing"
+    try:
+        await run_in_threadpool(os.rename, session_dir, claimed_dir)
+    except FileNotFoundError:
+        raise HTTPException(409, "Upload is already being completed")
+
+    try:
+        safe_name, absolute_path, public_path = await run_in_threadpool(_upload_target, user, manifest["file_name"])
+        await _write_atomically(
+            absolute_path,
+            _iter_files(os.path.join(claimed_dir, f"{i:06d}") for i in range(manifest["total_chunks"])),
+        )
+        doc = Document(
+            tenant_org_id=user.tenant_org_id,
+            owner_entity_type=manifest["owner_entity_type"],
+            owner_entity_id=manifest["owner_entity_id"],
+            document_type_id=manifest["document_type_id"],
+            file_name=safe_name,
+            file_path=public_path,
+            mime_type=manifest["mime_type"],
+            expiry_date=_parse_iso_date(manifest["expiry_date"], "expiry_date"),
+            is_signed=manifest["is_signed"],
+        )
+        result = await run_in_threadpool(_record_uploaded_document, db, user, doc)
+    except BaseException:
+        # Hand the session back so the client can retry complete
+        await run_in_threadpool(os.rename, claimed_dir, session_dir)
+        raise
+    async with aiofiles.open(done_path + ".part", "w") as f:
+        await f.write(json.dumps({"uploaded_by": user.id, "document_id": result["id"]}))
+    os.replace(done_path + ".part", done_path)
+    await run_in_threadpool(shutil.rmtree, claimed_dir, True)
+    return result
+
+
 @router.delete("/documents/{doc_id}")
 def delete_document(doc_id: int, db: Session = Depends(get_db), user: UserAccount = Depends(get_current_user)):
     doc = _document_query_for_user(db, user).filter(Document.id == doc_id).first()
     if not doc:
         raise HTTPException(404, "Document not found")
 
-    if doc.file_path and isinstance(doc.file_path, str) and doc.file_path.startswith("/uploads/"):
-        upload_root = _compliance_upload_dir()
-        relative_path = doc.file_path.replace("/uploads/", "", 1)
-        absolute_path = os.path.abspath(os.path.join(upload_root, relative_path))
-        if absolute_path.startswith(upload_root) and os.path.exists(absolute_path):
-            os.remove(absolute_path)
-
-    versions = db.query(DocumentVersion).filter(DocumentVersion.document_id == doc.id).all()
-    for v in versions:
-        if v.file_path and isinstance(v.file_path, str) and v.file_path.startswith("/uploads/"):
-            upload_root = _compliance_upload_dir()
-            relative_path = v.file_path.replace("/uploads/", "", 1)
-            absolute_path = os.path.abspath(os.path.join(upload_root, relative_path))
-            if absolute_path.startswith(upload_root) and os.path.exists(absolute_path):
-                os.remove(absolute_path)
-        db.delete(v)
+    file_paths = {doc.file_path}
+    file_paths.update(db.scalars(select(DocumentVersion.file_path).where(DocumentVersion.document_id == doc.id)))
+    file_paths.discard(None)
+    db.query(DocumentVersion).filter(DocumentVersion.document_id == doc.id).delete(synchronize_session=False)
     db.query(DocumentObligation).filter(DocumentObligation.document_id == doc.id).delete(synchronize_session=False)
     emit_outbox_event(
         db=db,
@@ -402,6 +585,15 @@ def delete_document(doc_id: int, db: Session = Depends(get_db), user: UserAccoun
     )
     db.delete(doc)
     db.commit()
+    # /uploads is served without auth, so remove the files now rather than
+    # waiting for the orphan sweep; paths another row still uses are kept.
+    if file_paths:
+        file_paths.difference_update(db.scalars(select(Document.file_path).where(Document.file_path.in_(file_paths))))
+        file_paths.difference_update(
+            db.scalars(select(DocumentVersion.file_path).where(DocumentVersion.file_path.in_(file_paths)))
+        )
+        for path in file_paths:
+            remove_upload(path)
     return {"message": "Document deleted"}
 
 
@@ -410,11 +602,11 @@ def list_document_versions(doc_id: int, db: Session = Depends(get_db), user: Use
     doc = _document_query_for_user(db, user).filter(Document.id == doc_id).first()
     if not doc:
         raise HTTPException(404, "Document not found")
-    q = db.query(DocumentVersion).filter(DocumentVersion.document_id == doc_id)
+    q = db.query(*_column_attrs(DocumentVersion)).filter(DocumentVersion.document_id == doc_id)
     if user.tenant_org_id:
         q = q.filter(DocumentVersion.tenant_org_id == user.tenant_org_id)
     items = q.order_by(DocumentVersion.version_number.desc(), DocumentVersion.id.desc()).all()
-    return {"total": len(items), "items": [_dict(x) for x in items]}
+    return {"total": len(items), "items": [x._asdict() for x in items]}
 
 
 @router.post("/documents/{doc_id}/versions/upload", status_code=201)
@@ -425,29 +617,33 @@ async def upload_document_version(
     db: Session = Depends(get_db),
     user: UserAccount = Depends(get_current_user),
 ):
+    doc = await run_in_threadpool(_get_document_for_user, db, user, doc_id)
+
+    safe_name, absolute_path, public_path = await run_in_threadpool(_upload_target, user, file.filename)
+    await _save_upload(file, absolute_path)
+
+    return await run_in_threadpool(
+        _record_document_version, db, user, doc, safe_name, public_path, file.content_type, notes,
+    )
+
+
+def _get_document_for_user(db: Session, user: UserAccount, doc_id: int) -> Document:
     doc = _document_query_for_user(db, user).filter(Document.id == doc_id).first()
     if not doc:
         raise HTTPException(404, "Document not found")
+    return doc
 
-    safe_name = os.path.basename(file.filename or "document")
-    ext = os.path.splitext(safe_name)[1]
-    stored_name = f"{datetime.utcnow().strftime('%Y%m%d%H%M%S')}_{uuid4().hex[:8]}{ext}"
-    tenant_folder = str(user.tenant_org_id) if user.tenant_org_id else "global"
-    upload_root = _compliance_upload_dir()
-    save_dir = os.path.join(upload_root, "compliance", tenant_folder)
-    os.makedirs(save_dir, exist_ok=True)
-    absolute_path = os.path.join(save_dir, stored_name)
-    with open(absolute_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
 
+def _record_document_version(db: Session, user: UserAccount, doc: Document, file_name: str,
+                             file_path: str, mime_type: Optional[str], notes: Optional[str]) -> dict:
     current_max = db.query(DocumentVersion).filter(DocumentVersion.document_id == doc.id).order_by(
         DocumentVersion.version_number.desc()
     ).first()
     next_version = int(current_max.version_number) + 1 if current_max else int(doc.version_number or 1) + 1
 
-    doc.file_name = safe_name
-    doc.file_path = f"/uploads/compliance/{tenant_folder}/{stored_name}"
-    doc.mime_type = file.content_type
+    doc.file_name = file_name
+    doc.file_path = file_path
+    doc.mime_type = mime_type
     doc.version_number = next_version
     db.add(DocumentVersion(
         tenant_org_id=user.tenant_org_id,
@@ -481,7 +677,7 @@ def list_document_obligations(
     db: Session = Depends(get_db),
     user: UserAccount = Depends(get_current_user),
 ):
-    q = db.query(DocumentObligation)
+    q = db.query(*_column_attrs(DocumentObligation))
     if user.tenant_org_id:
         q = q.filter(DocumentObligation.tenant_org_id == user.tenant_org_id)
     if status:
@@ -491,7 +687,7 @@ def list_document_obligations(
     if due_before:
         q = q.filter(DocumentObligation.due_date <= _parse_iso_date(due_before, "due_before"))
     items = q.order_by(DocumentObligation.due_date.asc(), DocumentObligation.id.desc()).all()
-    return {"total": len(items), "items": [_dict(x) for x in items]}
+    return {"total": len(items), "items": [x._asdict() for x in items]}
 
 
 @router.post("/obligations", status_code=201)
@@ -528,15 +724,16 @@ def complete_document_obligation(obligation_id: int, data: dict, db: Session = D
 
 # --- Inspections ---
 @router.get("/inspections")
-def list_inspections(status: Optional[str] = None, db: Session = Depends(get_db),
-                     user: UserAccount = Depends(get_current_user)):
-    q = db.query(Inspection)
+def list_inspections(status: Optional[str] = None, skip: int = 0, limit: int = 50,
+                     db: Session = Depends(get_db), user: UserAccount = Depends(get_current_user)):
+    q = db.query(*_column_attrs(Inspection))
     if status:
         q = q.filter(Inspection.status == status)
     if user.tenant_org_id:
         q = q.filter(Inspection.tenant_org_id == user.tenant_org_id)
-    items = q.all()
-    return {"total": len(items), "items": [_dict(x) for x in items]}
+    total = q.count()
+    items = q.order_by(Inspection.id).offset(skip).limit(limit).all()
+    return {"total": total, "items": [x._asdict() for x in items]}
 
 
 @router.post("/inspections", status_code=201)
@@ -584,18 +781,20 @@ def delete_inspection(insp_id: int, db: Session = Depends(get_db), user: UserAcc
 # --- Compliance Items ---
 @router.get("/items")
 def list_compliance_items(status: Optional[str] = None, entity_type: Optional[str] = None,
+                          skip: int = 0, limit: int = 50,
                           db: Session = Depends(get_db), user: UserAccount = Depends(get_current_user)):
-    q = db.query(ComplianceItem)
+    # Listings select plain columns: rows skip the identity map and can
+    # never trigger per-row relationship loads.
+    q = db.query(*_column_attrs(ComplianceItem))
     if status:
         q = q.filter(ComplianceItem.status == status)
     if entity_type:
         q = q.filter(ComplianceItem.entity_type == entity_type)
     if user.tenant_org_id:
-        q = q.join(ComplianceRequirement, ComplianceItem.requirement_id == ComplianceRequirement.id).filter(
-            ComplianceRequirement.tenant_org_id == user.tenant_org_id
-        )
-    items = q.all()
-    return {"total": len(items), "items": [_dict(x) for x in items]}
+        q = q.join(ComplianceItem.requirement).filter(ComplianceRequirement.tenant_org_id == user.tenant_org_id)
+    total = q.count()
+    items = q.order_by(ComplianceItem.id).offset(skip).limit(limit).all()
+    return {"total": total, "items": [x._asdict() for x in items]}
 
 
 @router.post("/items", status_code=201)
@@ -608,6 +807,19 @@ def create_compliance_item(data: dict, db: Session = Depends(get_db), user: User
     db.commit()
     db.refresh(ci)
     return _dict(ci)
+
+
+@router.post("/items/bulk", status_code=201)
+def create_compliance_items_bulk(data: list[dict], db: Session = Depends(get_db),
+                                 user: UserAccount = Depends(get_current_user)):
+    rows = []
+    for i, item in enumerate(_check_bulk_size(data)):
+        clean = _sanitize_compliance_item_data(item)
+        if not clean.get("requirement_id"):
+            raise HTTPException(400, f"Row {i}: field 'requirement_id' is required")
+        rows.append(clean)
+    items = _bulk_insert(db, ComplianceItem, rows)
+    return {"total": len(items), "items": items}
 
 
 @router.put("/items/{item_id}")
@@ -626,3 +838,35 @@ def update_compliance_item(item_id: int, data: dict, db: Session = Depends(get_d
 
 def _dict(obj):
     return {c.name: getattr(obj, c.name) for c in obj.__table__.columns}
+
+
+def _check_bulk_size(rows: list) -> list:
+    if not rows:
+        raise HTTPException(400, "Expected a non-empty list of rows")
+    if len(rows) > _BULK_MAX_ROWS:
+        raise HTTPException(400, f"At most {_BULK_MAX_ROWS} rows per request")
+    return rows
+
+
+def _bulk_insert(db: Session, model, rows: list) -> list:
+    """Insert sanitized rows with one executemany INSERT ... RETURNING and commit once.
+
+    An executemany statement binds the same parameters for every row, so rows
+    are padded to a common key set using each column's scalar default.
+    """
+    columns = model.__table__.c
+    keys = set().union(*rows)
+    padding = {
+        k: columns[k].default.arg if columns[k].default is not None and columns[k].default.is_scalar else None
+        for k in keys
+    }
+    stmt = insert(model).returning(*_column_attrs(model), sort_by_parameter_order=True)
+    items = [row._asdict() for row in db.execute(stmt, [{**padding, **row} for row in rows])]
+    db.commit()
+    return items
+
+
+@lru_cache(maxsize=None)
+def _column_attrs(model) -> tuple:
+    """Mapped column attributes of a model, for row queries that skip ORM hydration."""
+    return tuple(getattr(model, c.name) for c in model.__table__.columns)
@@ -1,6 +1,6 @@
 """Core property models – TenantOrg, Region, Property, Building, Floor, Unit, UnitAsset, Owner, Tenant, Vendor, StaffUser."""
 from sqlalchemy import (Column, Integer, BigInteger, String, Boolean, DateTime, Date,
-                         Text, Float, Numeric, ForeignKey, JSON, Index)
+                         Text, Float, Numeric, ForeignKey, JSON, Index, text)
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -180,6 +180,11 @@ UnitAsset = Asset
 
 class Owner(Base):
     __tablename__ = "owners"
+    __table_args__ = (
+        # Codes are unique per org among live rows; soft-deleted codes can be reused
+        Index("uq_owners_org_owner_code", "tenant_org_id", "owner_code", unique=True,
+              postgresql_where=text("NOT is_deleted"), sqlite_where=text("is_deleted = 0")),
+    )
     id = Column(Integer, primary_key=True, autoincrement=True)
     tenant_org_id = Column(Integer, ForeignKey("tenant_orgs.id"))
     owner_code = Column(String(50), nullable=False)
@@ -214,6 +219,11 @@ class PropertyOwnerLink(Base):
 
 class Tenant(Base):
     __tablename__ = "tenants"
+    __table_args__ = (
+        # Codes are unique per org among live rows; soft-deleted codes can be reused
+        Index("uq_tenants_org_tenant_code", "tenant_org_id", "tenant_code", unique=True,
+              postgresql_where=text("NOT is_deleted"), sqlite_where=text("is_deleted = 0")),
+    )
     id = Column(Integer, primary_key=True, autoincrement=True)
     tenant_org_id = Column(Integer, ForeignKey("tenant_orgs.id"))
     tenant_code = Column(String(50), nullable=False)
@@ -235,6 +245,11 @@ class Tenant(Base):
 
 class Vendor(Base):
     __tablename__ = "vendors"
+    __table_args__ = (
+        # Codes are unique per org among live rows; soft-deleted codes can be reused
+        Index("uq_vendors_org_vendor_code", "tenant_org_id", "vendor_code", unique=True,
+              postgresql_where=text("NOT is_deleted"), sqlite_where=text("is_deleted = 0")),
+    )
     id = Column(Integer, primary_key=True, autoincrement=True)
     tenant_org_id = Column(Integer, ForeignKey("tenant_orgs.id"))
     vendor_code = Column(String(50), nullable=False)
@@ -254,6 +269,9 @@ class Vendor(Base):
 
 class StaffUser(Base):
     __tablename__ = "staff_users"
+    __table_args__ = (
+        Index("uq_staff_users_org_employee_code", "tenant_org_id", "employee_code", unique=True),
+    )
     id = Column(Integer, primary_key=True, autoincrement=True)
     tenant_org_id = Column(Integer, ForeignKey("tenant_orgs.id"))
     employee_code = Column(String(50), nullable=False)
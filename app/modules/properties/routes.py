@@ -15,6 +15,7 @@ from app.modules.properties.models import (
     Property, Building, Floor, Unit, Asset, UnitAsset, Owner, Tenant, Vendor,
     PropertyOwnerLink, Region, TenantOrg, StaffUser
 )
+from app.utils.integrity_service import commit_or_conflict
 from app.utils.qrcode_service import generate_qr_code
 from app.modules.compliance.models import Document
 import os
@@ -22,6 +23,7 @@ import shutil
 from datetime import datetime, date
 
 logger = logging.getLogger(__name__)
+
 router = APIRouter(
     prefix="/api/properties",
     tags=["Properties"],
@@ -734,9 +736,11 @@ def create_tenant(data: dict, db: Session = Depends(get_db), user: UserAccount =
     )
     if user.tenant_org_id:
         clean_data["tenant_org_id"] = user.tenant_org_id
+    if not clean_data.get("tenant_code"):
+        raise HTTPException(status_code=422, detail="tenant_code is required")
     tenant = Tenant(**clean_data)
     db.add(tenant)
-    db.commit()
+    commit_or_conflict(db, "Tenant conflicts with an existing record")
     db.refresh(tenant)
     return _tenant_dict(tenant)
 
@@ -769,7 +773,7 @@ def update_tenant(tenant_id: int, data: dict, db: Session = Depends(get_db), use
         clean_data["tenant_org_id"] = user.tenant_org_id
     for k, v in clean_data.items():
         setattr(t, k, v)
-    db.commit()
+    commit_or_conflict(db, "Tenant update conflicts with an existing record")
     db.refresh(t)
     return _tenant_dict(t)
 
@@ -844,7 +848,7 @@ def create_staff(data: dict, db: Session = Depends(get_db), user: UserAccount =
         raise HTTPException(status_code=409, detail="employee_code already exists")
     staff = StaffUser(**clean_data)
     db.add(staff)
-    db.commit()
+    commit_or_conflict(db, "Staff member conflicts with an existing record")
     db.refresh(staff)
     return _staff_dict(staff)
 
@@ -897,7 +901,7 @@ def update_staff(staff_id: int, data: dict, db: Session = Depends(get_db), user:
         for linked_user in uq.all():
             linked_user.role_id = clean_data["role_id"]
 
-    db.commit()
+    commit_or_conflict(db, "Staff member update conflicts with an existing record")
     db.refresh(staff)
     return _staff_dict(staff)
 
@@ -952,9 +956,11 @@ def create_owner(data: dict, db: Session = Depends(get_db), user: UserAccount =
     )
     if user.tenant_org_id:
         clean_data["tenant_org_id"] = user.tenant_org_id
+    if not clean_data.get("owner_code"):
+        raise HTTPException(status_code=422, detail="owner_code is required")
     owner = Owner(**clean_data)
     db.add(owner)
-    db.commit()
+    commit_or_conflict(db, "Owner conflicts with an existing record")
     db.refresh(owner)
     return _owner_dict(owner)
 
@@ -987,7 +993,7 @@ def update_owner(owner_id: int, data: dict, db: Session = Depends(get_db), user:
         clean_data["tenant_org_id"] = user.tenant_org_id
     for k, v in clean_data.items():
         setattr(o, k, v)
-    db.commit()
+    commit_or_conflict(db, "Owner update conflicts with an existing record")
     db.refresh(o)
     return _owner_dict(o)
 
@@ -1031,9 +1037,11 @@ def create_vendor(data: dict, db: Session = Depends(get_db), user: UserAccount =
     )
     if user.tenant_org_id:
         clean_data["tenant_org_id"] = user.tenant_org_id
+    if not clean_data.get("vendor_code") or not clean_data.get("company_name"):
+        raise HTTPException(status_code=422, detail="vendor_code and company_name are required")
     vendor = Vendor(**clean_data)
     db.add(vendor)
-    db.commit()
+    commit_or_conflict(db, "Vendor conflicts with an existing record")
     db.refresh(vendor)
     return _v_dict(vendor)
 
@@ -1066,7 +1074,7 @@ def update_vendor(vendor_id: int, data: dict, db: Session = Depends(get_db), use
         clean_data["tenant_org_id"] = user.tenant_org_id
     for k, v_val in clean_data.items():
         setattr(v, k, v_val)
-    db.commit()
+    commit_or_conflict(db, "Vendor update conflicts with an existing record")
     db.refresh(v)
     return _v_dict(v)
 
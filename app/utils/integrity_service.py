@@ -0,0 +1,44 @@
+"""Map unique-constraint violations to 409 responses."""
+from typing import Optional
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+# Unique index -> (columns SQLite names in its error, 409 message). Postgres
+# reports the index name; SQLite only lists "table.column" pairs.
+UNIQUE_CONSTRAINTS = {
+    "ix_user_accounts_username": ("user_accounts.username", "Username already exists"),
+    "ix_user_accounts_email": ("user_accounts.email", "Email already exists"),
+    "uq_tenants_org_tenant_code": ("tenants.tenant_org_id, tenants.tenant_code", "Tenant code already exists"),
+    "uq_owners_org_owner_code": ("owners.tenant_org_id, owners.owner_code", "Owner code already exists"),
+    "uq_vendors_org_vendor_code": ("vendors.tenant_org_id, vendors.vendor_code", "Vendor code already exists"),
+    "uq_staff_users_org_employee_code": (
+        "staff_users.tenant_org_id, staff_users.employee_code", "Employee code already exists",
+    ),
+}
+_SQLITE_UNIQUE_PREFIX = "UNIQUE constraint failed: "
+_SQLITE_MESSAGES = {columns: message for columns, message in UNIQUE_CONSTRAINTS.values()}
+
+
+def conflict_detail(exc: IntegrityError, default: str) -> Optional[str]:
+    """409 message for a unique violation, or None for any other integrity error."""
+    orig = exc.orig
+    if getattr(orig, "pgcode", None) == "23505" or getattr(orig, "sqlstate", None) == "23505":
+        name = getattr(getattr(orig, "diag", None), "constraint_name", None)
+        return UNIQUE_CONSTRAINTS.get(name, (None, default))[1]
+    message = str(orig)
+    if message.startswith(_SQLITE_UNIQUE_PREFIX):
+        return _SQLITE_MESSAGES.get(message[len(_SQLITE_UNIQUE_PREFIX):], default)
+    return None
+
+
+def commit_or_conflict(db: Session, default: str) -> None:
+    """Commit, turning a unique-constraint violation into a 409; other integrity errors propagate."""
+    try:
+        db.commit()
+    except IntegrityError as exc:
+        db.rollback()
+        detail = conflict_detail(exc, default)
+        if detail is None:
+            raise
+        raise HTTPException(status_code=409, detail=detail) from exc
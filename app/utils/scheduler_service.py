@@ -34,6 +34,19 @@ class JobScheduler:
             cls._scheduler.shutdown()
             logger.info("APScheduler stopped.")
 
+    @classmethod
+    def add_interval_job(cls, func, job_id: str, minutes: int):
+        """Register an in-process maintenance job that is not backed by a JobSchedule row."""
+        cls._scheduler.add_job(
+            func,
+            IntervalTrigger(minutes=minutes),
+            id=job_id,
+            replace_existing=True,
+            coalesce=True,
+            max_instances=1,
+        )
+        logger.info(f"Scheduled maintenance job: {job_id} every {minutes} min")
+
     @classmethod
     def load_all_jobs(cls):
         """Load all active jobs from the database into the scheduler."""
@@ -0,0 +1,93 @@
+"""Upload housekeeping - removes compliance files that no document row references."""
+import logging
+import os
+import shutil
+import time
+from typing import Optional
+from sqlalchemy import select
+from app.config import get_settings
+from app.database import SessionLocal
+from app.modules.compliance.models import Document, DocumentVersion
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+def upload_root() -> str:
+    """Absolute UPLOAD_DIR; relative values resolve against the project root."""
+    upload_dir = settings.UPLOAD_DIR
+    if not os.path.isabs(upload_dir):
+        project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+        upload_dir = os.path.join(project_root, upload_dir)
+    return os.path.abspath(upload_dir)
+
+
+def remove_upload(public_path: Optional[str]) -> bool:
+    """Best-effort delete of the file behind an /uploads/... path; never reaches outside UPLOAD_DIR."""
+    if not isinstance(public_path, str) or not public_path.startswith("/uploads/"):
+        return False
+    root = upload_root()
+    absolute_path = os.path.abspath(os.path.join(root, public_path[len("/uploads/"):]))
+    if not absolute_path.startswith(root + os.sep):
+        return False
+    try:
+        os.remove(absolute_path)
+    except OSError:
+        return False
+    return True
+
+
+def sweep_orphan_uploads(max_age_hours: Optional[float] = None) -> int:
+    """Delete compliance files and stale chunked-upload sessions nothing references.
+
+    Only entries untouched for max_age_hours are removed, so a file whose
+    document row is not committed yet, or a chunked upload still in progress,
+    is left alone. Returns the number of files and sessions removed.
+    """
+    if max_age_hours is None:
+        max_age_hours = settings.UPLOAD_ORPHAN_MAX_AGE_HOURS
+    root = upload_root()
+    compliance_root = os.path.join(root, "compliance")
+    if not os.path.isdir(compliance_root):
+        return 0
+    cutoff = time.time() - max_age_hours * 3600
+
+    with SessionLocal() as db:
+        referenced = set(db.scalars(select(Document.file_path).where(Document.file_path.isnot(None))))
+        referenced.update(db.scalars(select(DocumentVersion.file_path).where(DocumentVersion.file_path.isnot(None))))
+
+    removed = 0
+    chunks_root = os.path.join(compliance_root, ".chunks")
+    for dirpath, dirnames, filenames in os.walk(compliance_root):
+        if dirpath == compliance_root and ".chunks" in dirnames:
+            dirnames.remove(".chunks")
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            public_path = "/uploads/" + os.path.relpath(path, root).replace(os.sep, "/")
+            try:
+                if public_path not in referenced and os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except FileNotFoundError:
+                continue
+
+    # A chunked session is abandoned once none of its chunks changed within the window;
+    # "<id>.done" completion markers only need to outlive client retries
+    if os.path.isdir(chunks_root):
+        for entry in os.scandir(chunks_root):
+            if not entry.is_dir():
+                try:
+                    if entry.stat().st_mtime < cutoff:
+                        os.remove(entry.path)
+                        removed += 1
+                except FileNotFoundError:
+                    pass
+                continue
+            newest = max((f.stat().st_mtime for f in os.scandir(entry.path)), default=entry.stat().st_mtime)
+            if newest < cutoff:
+                shutil.rmtree(entry.path, ignore_errors=True)
+                removed += 1
+
+    if removed:
+        logger.info(f"Upload sweep removed {removed} orphaned compliance files/sessions.")
+    return removed
@@ -1,14 +1,24 @@
 """Automated test suite for Property Management V2."""
-import sys, os
+import sys, os, shutil, tempfile
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 os.environ["DATABASE_URL"] = "sqlite:///./test_prop_management.db"
+UPLOAD_DIR = os.environ["UPLOAD_DIR"] = tempfile.mkdtemp(prefix="pm-test-uploads-")
 
+import sqlite3
 import pytest
+from datetime import date
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import sessionmaker
 from app.main import app
 from app.database import get_db, Base
+from app.auth.dependencies import create_access_token
+from app.auth.models import Role, UserAccount
+from app.modules.billing.models import Payment, PaymentAllocation
+from app.modules.properties.models import TenantOrg
+from app.modules.system.models import EventOutbox
+from app.utils.integrity_service import conflict_detail
 
 TEST_DB = "sqlite:///./test_prop_management.db"
 engine = create_engine(TEST_DB, connect_args={"check_same_thread": False})
@@ -32,11 +42,14 @@ _token = None
 
 @pytest.fixture(scope="session", autouse=True)
 def setup_db():
+    # Rebuild from the current models; a leftover DB file may predate new indexes
+    Base.metadata.drop_all(bind=engine)
     Base.metadata.create_all(bind=engine)
     yield
     Base.metadata.drop_all(bind=engine)
     if os.path.exists("./test_prop_management.db"):
         os.remove("./test_prop_management.db")
+    shutil.rmtree(UPLOAD_DIR, ignore_errors=True)
 
 
 def _login():
@@ -60,6 +73,29 @@ def _login():
     return {"Authorization": f"Bearer {_token}"}
 
 
+def _org_headers(org_code):
+    """Seed an org with an admin user directly (no register round-trip) and return its auth header."""
+    db = TestSession()
+    try:
+        role = db.query(Role).filter(Role.role_name == "admin").first()
+        if role is None:
+            role = Role(role_name="admin", permissions={"all": True}, is_active=True)
+            db.add(role)
+        org = TenantOrg(org_name=f"Org {org_code}", org_code=org_code)
+        db.add(org)
+        db.flush()
+        user = UserAccount(
+            username=f"admin-{org_code}", email=f"admin-{org_code.lower()}@example.com",
+            password_hash="x", role=role, tenant_org_id=org.id,
+        )
+        db.add(user)
+        db.commit()
+        token = create_access_token({"sub": str(user.id)})
+        return {"Authorization": f"Bearer {token}"}, org.id
+    finally:
+        db.close()
+
+
 # ═══════════════════════════════════════
 # Health
 # ═══════════════════════════════════════
@@ -297,3 +333,381 @@ class TestExportAutomation:
     def test_auto_terminate(self):
         r = client.post("/api/automation/auto-terminate", headers=_login())
         assert r.status_code == 200
+
+
+# ═══════════════════════════════════════
+# Unique entity codes
+# ═══════════════════════════════════════
+class TestUniqueCodes:
+    def test_duplicate_codes_conflict(self):
+        headers, _ = _org_headers("UQ")
+        for path, payload in (
+            ("/api/tenants", {"tenant_code": "UQ-T1", "first_name": "Ann"}),
+            ("/api/owners", {"owner_code": "UQ-O1", "first_name": "Bob"}),
+            ("/api/vendors", {"vendor_code": "UQ-V1", "company_name": "Acme"}),
+        ):
+            r = client.post(path, json=payload, headers=headers)
+            assert r.status_code in (200, 201), r.text
+            r = client.post(path, json=payload, headers=headers)
+            assert r.status_code == 409, r.text
+
+    def test_duplicate_code_on_update_conflicts(self):
+        headers, _ = _org_headers("UQU")
+        client.post("/api/tenants", json={"tenant_code": "UQU-1", "first_name": "A"}, headers=headers)
+        second = client.post("/api/tenants", json={"tenant_code": "UQU-2", "first_name": "B"}, headers=headers).json()
+        r = client.put(f"/api/tenants/{second['id']}", json={"tenant_code": "UQU-1"}, headers=headers)
+        assert r.status_code == 409
+        assert r.json()["detail"] == "Tenant code already exists"
+
+    def test_missing_code_is_not_a_conflict(self):
+        headers, _ = _org_headers("UQN")
+        r = client.post("/api/tenants", json={"first_name": "NoCode"}, headers=headers)
+        assert r.status_code == 422
+
+    def test_only_unique_violations_map_to_conflicts(self):
+        class PgError(Exception):
+            def __init__(self, pgcode, constraint_name=None):
+                super().__init__("duplicate key value violates unique constraint")
+                self.pgcode = pgcode
+                self.diag = type("Diag", (), {"constraint_name": constraint_name})()
+
+        def wrap(orig):
+            return IntegrityError("INSERT ...", {}, orig)
+
+        sqlite_unique = sqlite3.IntegrityError("UNIQUE constraint failed: tenants.tenant_org_id, tenants.tenant_code")
+        assert conflict_detail(wrap(sqlite_unique), "x") == "Tenant code already exists"
+        sqlite_other_unique = sqlite3.IntegrityError("UNIQUE constraint failed: roles.role_name")
+        assert conflict_detail(wrap(sqlite_other_unique), "default") == "default"
+        assert conflict_detail(wrap(sqlite3.IntegrityError("NOT NULL constraint failed: tenants.tenant_code")), "x") is None
+        assert conflict_detail(wrap(sqlite3.IntegrityError("FOREIGN KEY constraint failed")), "x") is None
+        assert conflict_detail(wrap(PgError("23505", "uq_owners_org_owner_code")), "x") == "Owner code already exists"
+        assert conflict_detail(wrap(PgError("23505", "ix_user_accounts_email")), "x") == "Email already exists"
+        assert conflict_detail(wrap(PgError("23502")), "x") is None
+
+
+# ═══════════════════════════════════════
+# Billing org isolation
+# ═══════════════════════════════════════
+def _invoice(headers, number, **extra):
+    r = client.post("/api/billing/invoices", json={
+        "invoice_number": number, "tenant_id": 1, "invoice_date": "2026-01-01",
+        "due_date": "2026-01-31", "document_amount": 100, "total_amount": 100,
+        "invoice_status": "Posted", **extra,
+    }, headers=headers)
+    assert r.status_code == 201, r.text
+    return r.json()
+
+
+class TestBillingIsolation:
+    def test_reads_are_scoped_to_org(self):
+        a, _ = _org_headers("ISO-RA")
+        b, _ = _org_headers("ISO-RB")
+        inv_a = _invoice(a, "ISO-RA-1")
+        inv_b = _invoice(b, "ISO-RB-1")
+        numbers = {i["invoice_number"] for i in client.get("/api/billing/invoices", headers=a).json()["items"]}
+        assert "ISO-RA-1" in numbers and "ISO-RB-1" not in numbers
+        assert client.get(f"/api/billing/invoices/{inv_b['id']}", headers=a).status_code == 404
+        r = client.post("/api/billing/invoices/batch", json={"ids": [inv_a["id"], inv_b["id"]]}, headers=a)
+        assert [i["id"] for i in r.json()["items"]] == [inv_a["id"]]
+
+    def test_payment_cannot_settle_other_orgs_invoice(self):
+        a, _ = _org_headers("ISO-PA")
+        b, _ = _org_headers("ISO-PB")
+        inv_b = _invoice(b, "ISO-PB-1")
+        r = client.post("/api/billing/payments", json={
+            "payment_number": "ISO-PA-P1", "tenant_id": 1, "payment_date": "2026-01-05", "amount": 100,
+            "allocations": [{"invoice_id": inv_b["id"], "amount": 100}],
+        }, headers=a)
+        assert r.status_code == 404
+        assert client.get(f"/api/billing/invoices/{inv_b['id']}", headers=b).json()["invoice_status"] == "Posted"
+        payments = client.get("/api/billing/payments", headers=a).json()["items"]
+        assert "ISO-PA-P1" not in {p["payment_number"] for p in payments}
+
+    def test_void_payment_leaves_other_orgs_invoice(self):
+        a, org_a = _org_headers("ISO-VA")
+        b, _ = _org_headers("ISO-VB")
+        inv_b = _invoice(b, "ISO-VB-1", invoice_status="Paid")
+        # An allocation that crosses orgs can only come from bad data; void must not follow it
+        db = TestSession()
+        try:
+            pmt = Payment(tenant_org_id=org_a, payment_number="ISO-VA-P1", tenant_id=1,
+                          payment_date=date(2026, 1, 5), amount=100)
+            db.add(pmt)
+            db.flush()
+            db.add(PaymentAllocation(payment_id=pmt.id, invoice_id=inv_b["id"], allocated_amount=100))
+            db.commit()
+            pmt_id = pmt.id
+        finally:
+            db.close()
+        r = client.post(f"/api/billing/payments/{pmt_id}/void", headers=a)
+        assert r.status_code == 200
+        assert client.get(f"/api/billing/invoices/{inv_b['id']}", headers=b).json()["invoice_status"] == "Paid"
+
+    def test_late_fee_rules_are_scoped_to_org(self):
+        a, _ = _org_headers("ISO-LA")
+        b, _ = _org_headers("ISO-LB")
+        rule = client.post("/api/billing/late-fee-rules", json={"rule_name": "B fee", "fee_value": 25},
+                           headers=b).json()
+        r = client.put(f"/api/billing/late-fee-rules/{rule['id']}", json={"fee_value": 1}, headers=a)
+        assert r.status_code == 404
+        assert client.delete(f"/api/billing/late-fee-rules/{rule['id']}", headers=a).status_code == 404
+        r = client.put(f"/api/billing/late-fee-rules/{rule['id']}", json={"rule_name": "B fee v2"}, headers=b)
+        assert r.status_code == 200
+        assert r.json()["fee_value"] == 25
+
+    def test_cached_late_fee_list_is_per_org(self):
+        a, _ = _org_headers("ISO-CA")
+        b, _ = _org_headers("ISO-CB")
+        client.post("/api/billing/late-fee-rules", json={"rule_name": "A fee", "fee_value": 5}, headers=a)
+        client.post("/api/billing/late-fee-rules", json={"rule_name": "B fee", "fee_value": 7}, headers=b)
+        # The first list fills the cache; the other org must not be served from it
+        assert [r["rule_name"] for r in client.get("/api/billing/late-fee-rules", headers=a).json()["items"]] == ["A fee"]
+        assert [r["rule_name"] for r in client.get("/api/billing/late-fee-rules", headers=b).json()["items"]] == ["B fee"]
+        client.post("/api/billing/late-fee-rules", json={"rule_name": "B fee 2", "fee_value": 9}, headers=b)
+        assert client.get("/api/billing/late-fee-rules", headers=b).json()["total"] == 2
+        assert client.get("/api/billing/late-fee-rules", headers=a).json()["total"] == 1
+
+
+# ═══════════════════════════════════════
+# Compliance documents
+# ═══════════════════════════════════════
+def _upload_path(public_path):
+    return os.path.join(UPLOAD_DIR, public_path[len("/uploads/"):])
+
+
+class TestComplianceDocuments:
+    def test_delete_document_removes_files(self):
+        headers, _ = _org_headers("DOC-DEL")
+        doc = client.post("/api/compliance/documents/upload", data={
+            "owner_entity_type": "Property", "owner_entity_id": "1",
+        }, files={"file": ("lease.txt", b"v1", "text/plain")}, headers=headers).json()
+        first = _upload_path(doc["file_path"])
+        r = client.post(f"/api/compliance/documents/{doc['id']}/versions/upload",
+                        files={"file": ("lease.txt", b"v2", "text/plain")}, headers=headers)
+        second = _upload_path(r.json()["file_path"])
+        assert os.path.exists(first) and os.path.exists(second)
+
+        assert client.delete(f"/api/compliance/documents/{doc['id']}", headers=headers).status_code == 200
+        assert not os.path.exists(first) and not os.path.exists(second)
+
+    def test_requirement_pages_cover_total(self):
+        headers, _ = _org_headers("DOC-PAGE")
+        for n in range(3):
+            client.post("/api/compliance/requirements", json={"requirement_name": f"Req {n}"}, headers=headers)
+        first = client.get("/api/compliance/requirements?skip=0&limit=2", headers=headers).json()
+        rest = client.get("/api/compliance/requirements?skip=2&limit=2", headers=headers).json()
+        assert first["total"] == rest["total"] == 3
+        assert len({r["id"] for r in first["items"] + rest["items"]}) == 3
+
+
+class TestChunkedUpload:
+    def _init(self, headers, total_chunks=2):
+        r = client.post("/api/compliance/documents/upload/init", json={
+            "owner_entity_type": "Property", "owner_entity_id": 1,
+            "file_name": "plan.pdf", "total_chunks": total_chunks,
+        }, headers=headers)
+        assert r.status_code == 201, r.text
+        return r.json()["upload_id"]
+
+    def _chunk(self, headers, upload_id, index, body):
+        return client.post("/api/compliance/documents/upload/chunk", data={
+            "upload_id": upload_id, "index": str(index),
+        }, files={"chunk": ("blob", body, "application/octet-stream")}, headers=headers)
+
+    def test_chunks_resume_and_complete_in_order(self):
+        headers, _ = _org_headers("CHUNK-OK")
+        upload_id = self._init(headers)
+        assert self._chunk(headers, upload_id, 1, b"world").status_code == 200
+        status = client.get(f"/api/compliance/documents/upload/{upload_id}", headers=headers).json()
+        assert status["received"] == [1]
+        r = client.post("/api/compliance/documents/upload/complete", json={"upload_id": upload_id}, headers=headers)
+        assert r.status_code == 400
+
+        assert self._chunk(headers, upload_id, 0, b"hello ").status_code == 200
+        r = client.post("/api/compliance/documents/upload/complete", json={"upload_id": upload_id}, headers=headers)
+        assert r.status_code == 201, r.text
+        doc = r.json()
+        with open(_upload_path(doc["file_path"]), "rb") as f:
+            assert f.read() == b"hello world"
+
+    def test_complete_is_idempotent(self):
+        headers, _ = _org_headers("CHUNK-RETRY")
+        upload_id = self._init(headers, total_chunks=1)
+        self._chunk(headers, upload_id, 0, b"data")
+        first = client.post("/api/compliance/documents/upload/complete", json={"upload_id": upload_id}, headers=headers)
+        again = client.post("/api/compliance/documents/upload/complete", json={"upload_id": upload_id}, headers=headers)
+        assert first.status_code == 201 and again.status_code in (200, 201)
+        assert again.json()["id"] == first.json()["id"]
+        docs = client.get("/api/compliance/documents", headers=headers).json()
+        assert docs["total"] == 1
+
+    def test_complete_in_progress_conflicts(self):
+        headers, _ = _org_headers("CHUNK-RACE")
+        upload_id = self._init(headers, total_chunks=1)
+        self._chunk(headers, upload_id, 0, b"data")
+        session_dir = os.path.join(UPLOAD_DIR, "compliance", ".chunks", upload_id)
+        # Stand-in for a concurrent complete that has already claimed the session
+        os.rename(session_dir, session_dir + ".completing")
+        r = client.post("/api/compliance/documents/upload/complete", json={"upload_id": upload_id}, headers=headers)
+        assert r.status_code == 409
+        assert client.get("/api/compliance/documents", headers=headers).json()["total"] == 0
+
+    def test_rejects_oversized_chunk(self):
+        headers, _ = _org_headers("CHUNK-BIG")
+        init = client.post("/api/compliance/documents/upload/init", json={
+            "owner_entity_type": "Property", "owner_entity_id": 1, "file_name": "big.bin", "total_chunks": 2,
+        }, headers=headers).json()
+        upload_id, chunk_size = init["upload_id"], init["chunk_size"]
+        assert self._chunk(headers, upload_id, 0, b"x" * (chunk_size + 1)).status_code == 413
+        session_dir = os.path.join(UPLOAD_DIR, "compliance", ".chunks", upload_id)
+        assert sorted(os.listdir(session_dir)) == ["manifest.json"]
+        assert self._chunk(headers, upload_id, 0, b"x" * chunk_size).status_code == 200
+
+    def test_rejects_traversal_and_other_users(self):
+        headers, _ = _org_headers("CHUNK-OWN")
+        other, _ = _org_headers("CHUNK-OTHER")
+        upload_id = self._init(headers)
+        for bad_id in ("../../etc", "../" + upload_id, upload_id.upper()):
+            assert self._chunk(headers, bad_id, 0, b"x").status_code == 404
+            r = client.post("/api/compliance/documents/upload/complete", json={"upload_id": bad_id}, headers=headers)
+            assert r.status_code == 404
+        assert self._chunk(other, upload_id, 0, b"x").status_code == 404
+        assert client.get(f"/api/compliance/documents/upload/{upload_id}", headers=other).status_code == 404
+        r = client.post("/api/compliance/documents/upload/complete", json={"upload_id": upload_id}, headers=other)
+        assert r.status_code == 404
+
+
+# ═══════════════════════════════════════
+# Billing FX revaluation
+# ═══════════════════════════════════════
+_REVALUED_FIELDS = ("base_amount", "exchange_rate_id", "exchange_rate_value", "fx_difference_amount")
+_LEDGER_FIELDS = ("reference_type", "posting_date", "txn_currency", "txn_amount", "base_currency",
+                  "base_amount", "fx_rate", "entry_side")
+
+
+def _revaluation_outcome(headers, inv):
+    """Invoice fields, ledger row and outbox event a revaluation left for `inv`."""
+    fresh = client.get(f"/api/billing/invoices/{inv['id']}", headers=headers).json()
+    ledger = client.get(
+        f"/api/billing/ledger-entries?reference_type=Revaluation&reference_id={inv['id']}", headers=headers
+    ).json()["items"]
+    assert len(ledger) == 1
+    db = TestSession()
+    try:
+        events = db.query(EventOutbox).filter(
+            EventOutbox.event_type == "invoice.revalued", EventOutbox.aggregate_id == inv["id"]
+        ).all()
+        assert len(events) == 1
+        event = {"event_key": events[0].event_key, **events[0].payload}
+    finally:
+        db.close()
+    number = inv["invoice_number"]
+    return (
+        {k: fresh[k] for k in _REVALUED_FIELDS},
+        {**{k: ledger[0][k] for k in _LEDGER_FIELDS}, "notes": ledger[0]["notes"].replace(number, "#")},
+        {**event, "event_key": event["event_key"].replace(f".{inv['id']}.", ".#.", 1), "invoice_number": "#"},
+    )
+
+
+class TestFxRevaluation:
+    def test_batch_matches_single_revaluation(self):
+        single, _ = _org_headers("FX-ONE")
+        batch, _ = _org_headers("FX-BATCH")
+        r = client.post("/api/billing/fx-rates", json={
+            "rate_date": "2026-02-01", "from_currency": "EUR", "to_currency": "USD", "rate": 1.25,
+        }, headers=single)
+        assert r.status_code == 201, r.text
+        fx = {"document_currency": "EUR", "base_currency": "USD", "document_amount": 80, "total_amount": 80}
+        one = _invoice(single, "FX-ONE-1", **fx)
+        many = _invoice(batch, "FX-BATCH-1", **fx)
+        no_rate = _invoice(batch, "FX-BATCH-2", document_currency="GBP", base_currency="USD")
+        _invoice(batch, "FX-BATCH-3")
+
+        r = client.post(f"/api/billing/invoices/{one['id']}/revalue", json={"as_of": "2026-02-15"}, headers=single)
+        assert r.status_code == 200, r.text
+        r = client.post("/api/billing/invoices/revalue-batch", json={"as_of": "2026-02-15"}, headers=batch)
+        assert r.status_code == 200, r.text
+        body = r.json()
+        assert body["revalued"] == 1
+        assert body["skipped"] == [no_rate["id"]]
+        assert body["total_gain_loss"] == 20.0
+
+        assert _revaluation_outcome(batch, many) == _revaluation_outcome(single, one)
+        untouched = client.get(f"/api/billing/invoices/{no_rate['id']}", headers=batch).json()
+        assert untouched["exchange_rate_id"] is None
+
+    def test_batch_limited_to_ids(self):
+        headers, _ = _org_headers("FX-IDS")
+        client.post("/api/billing/fx-rates", json={
+            "rate_date": "2026-03-01", "from_currency": "CHF", "to_currency": "USD", "rate": 1.1,
+        }, headers=headers)
+        fx = {"document_currency": "CHF", "base_currency": "USD"}
+        picked = _invoice(headers, "FX-IDS-1", **fx)
+        _invoice(headers, "FX-IDS-2", **fx)
+        r = client.post("/api/billing/invoices/revalue-batch",
+                        json={"as_of": "2026-03-02", "ids": [picked["id"]]}, headers=headers)
+        assert r.json()["revalued"] == 1
+        r = client.post("/api/billing/invoices/revalue-batch", json={"ids": "1,2"}, headers=headers)
+        assert r.status_code == 400
+
+
+class TestInvoiceBatch:
+    def test_returns_requested_invoices_with_lines(self):
+        headers, _ = _org_headers("BATCH")
+        first = _invoice(headers, "BATCH-1", lines=[
+            {"description": "Rent", "line_amount": 90},
+            {"description": "Parking", "line_amount": 10},
+        ])
+        second = _invoice(headers, "BATCH-2")
+        _invoice(headers, "BATCH-3")
+        r = client.post("/api/billing/invoices/batch", json={"ids": [first["id"], second["id"], 999999]},
+                        headers=headers)
+        assert r.status_code == 200, r.text
+        body = r.json()
+        assert body["total"] == 2
+        assert [i["id"] for i in body["items"]] == [second["id"], first["id"]]
+        lines = {i["id"]: sorted(l["description"] for l in i["lines"]) for i in body["items"]}
+        assert lines == {first["id"]: ["Parking", "Rent"], second["id"]: []}
+
+    def test_rejects_bad_id_lists(self):
+        headers, _ = _org_headers("BATCH-BAD")
+        for ids in ("1,2", [1, "2"], list(range(501))):
+            r = client.post("/api/billing/invoices/batch", json={"ids": ids}, headers=headers)
+            assert r.status_code == 400
+
+
+class TestComplianceBulk:
+    def test_bulk_requirements_and_items(self):
+        headers, org_id = _org_headers("BULK")
+        r = client.post("/api/compliance/requirements/bulk", json=[
+            {"requirement_name": "Fire safety", "frequency": "Annual", "tenant_org_id": 999},
+            {"requirement_name": "Gas check", "is_active": False},
+        ], headers=headers)
+        assert r.status_code == 201, r.text
+        reqs = r.json()["items"]
+        assert [q["requirement_name"] for q in reqs] == ["Fire safety", "Gas check"]
+        assert [q["is_active"] for q in reqs] == [True, False]
+        assert [q["frequency"] for q in reqs] == ["Annual", None]
+        assert {q["tenant_org_id"] for q in reqs} == {org_id}
+
+        r = client.post("/api/compliance/items/bulk", json=[
+            {"requirement_id": reqs[0]["id"], "entity_type": "Property", "entity_id": "7", "due_date": "2026-05-01"},
+            {"requirement_id": reqs[1]["id"], "status": "Done"},
+        ], headers=headers)
+        assert r.status_code == 201, r.text
+        items = r.json()["items"]
+        assert [i["requirement_id"] for i in items] == [reqs[0]["id"], reqs[1]["id"]]
+        assert items[0]["entity_id"] == 7 and items[0]["due_date"] == "2026-05-01"
+        assert [i["status"] for i in items] == ["Pending", "Done"]
+        assert client.get("/api/compliance/items", headers=headers).json()["total"] == 2
+
+    def test_bulk_rejects_invalid_batches(self):
+        headers, _ = _org_headers("BULK-BAD")
+        r = client.post("/api/compliance/requirements/bulk", json=[
+            {"requirement_name": "Ok"}, {"frequency": "Annual"},
+        ], headers=headers)
+        assert r.status_code == 400 and r.json()["detail"].startswith("Row 1")
+        assert client.get("/api/compliance/requirements", headers=headers).json()["total"] == 0
+        assert client.post("/api/compliance/items/bulk", json=[], headers=headers).status_code == 400
+        too_many = [{"requirement_name": f"R{n}"} for n in range(501)]
+        assert client.post("/api/compliance/requirements/bulk", json=too_many, headers=headers).status_code == 400